@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+bench/bench_json.py
+
+역할:
+- 가짜 스냅샷(bench/synth.py)으로 serializer.py 백엔드별(표준 json / orjson) 성능 비교
+  → 저장소가 실제로 쓰는 serializer.load_file / serializer.dumps를 백엔드만 바꿔 측정
+  1) 스냅샷 파싱 시간: serializer.load_file(study_progress 컬럼형 / study_cert 행 형식)
+  2) 응답 인코딩 처리량: serializer.dumps(/progress/series, /progress/options 크기의 payload)
+- 시작 전에 serializer의 두 백엔드가 같은 bytes를 내는지 확인(float 지수 표기/NaN 등, 다르면 실패)
+
+사용:
+  python bench/bench_json.py --rooms 200 --users 50 --days 120
+"""
+
+import os, sys, argparse, math, random, struct, tempfile, time, datetime
+from contextlib import contextmanager
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth, serializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@contextmanager
+def _use_backend(name: str):
+    """serializer가 이 블록 안에서만 name 백엔드("orjson"/"json")를 쓰도록 전환(호출 시점에 모듈 전역을 보므로 가능)"""
+    saved = serializer.orjson
+    serializer.orjson = orjson if name == "orjson" else None
+    try:
+        yield
+    finally:
+        serializer.orjson = saved
+
+
+def check_parity(samples: int = 100000, seed: int = 7) -> int:
+    """
+    serializer.dumps의 orjson 경로와 표준 json 경로가 같은 bytes를 내는지 확인(orjson 없으면 건너뜀)
+    - float: 경계값(지수 표기 전환점, NaN/Infinity, -0.0) + 무작위 비트 패턴/크기
+    - 행: synth 행(date/Decimal 포함) + 중첩 구조
+    - 반환: 확인한 값 수, 다르면 AssertionError
+    """
+    if not orjson:
+        print("parity: orjson 없음 → 건너뜀")
+        return 0
+    rnd = random.Random(seed)
+    values = [1e-7, 1e-5, -1.5e-5, 1e-4, 1e15, 1e16, 1e21, 0.0, -0.0, 5e-324, 1.7976931348623157e308,
+              math.nan, math.inf, -math.inf, 0.1, 100.0]
+    for _ in range(samples):
+        values.append(struct.unpack("d", struct.pack("Q", rnd.getrandbits(64)))[0])
+        values.append(rnd.choice((1, -1)) * 10 ** rnd.uniform(-30, 30))
+    values += list(synth.iter_progress_rows(3, 5, 10, db_types=True))
+    values.append({"a": [1, 2.5, "한글", None, True, {"x": 1e-7}], "m": Decimal("1.50"), "d": datetime.date(2025, 1, 1)})
+    with _use_backend("orjson"):
+        fast = [serializer.dumps(v) for v in values]
+    with _use_backend("json"):
+        slow = [serializer.dumps(v) for v in values]
+    for v, a, b in zip(values, fast, slow):
+        assert a == b, f"backend mismatch for {v!r}: orjson={a!r} json={b!r}"
+    print(f"parity: {len(values):,} values identical (orjson == json)")
+    return len(values)
+
+
+def _best(fn, repeat: int) -> float:
+    """repeat회 실행 중 최솟값(초)"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def _backends() -> list[str]:
+    return ["json", "orjson"] if orjson else ["json"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rooms", type=int, default=100)
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--days", type=int, default=120)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--requests", type=int, default=20000, help="응답 인코딩 반복 횟수")
+    args = ap.parse_args()
+
+    check_parity()
+    rows = list(synth.iter_progress_rows(args.rooms, args.users, args.days))
+
+    # 응답 payload 샘플(series 1건 / options 전체)
+    first = [r for r in rows[:args.days] if r["nickname"] == rows[0]["nickname"]]
+    series = {"ok": True, "labels": [r["progress_date"] for r in first],
+              "data": [float(r["progress"]) for r in first], "count": len(first)}
+    options = {"ok": True, "opentalk_codes": sorted({r["opentalk_code"] for r in rows}),
+               "nicknames": sorted({r["nickname"] for r in rows[:args.users * args.days]})}
+    n_rows = len(rows)
+    del rows
+
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        # 스냅샷은 serializer.dumps(기본 백엔드)로 기록 → 두 백엔드가 같은 파일을 파싱
+        progress_path = synth.write_progress_snapshot(data_dir, args.rooms, args.users, args.days)
+        cert_path = synth.write_cert_snapshot(data_dir, args.rooms, args.users, args.days)
+        print(f"rows={n_rows:,} study_progress={os.path.getsize(progress_path) / 1e6:.1f}MB "
+              f"study_cert={os.path.getsize(cert_path) / 1e6:.1f}MB default={serializer.BACKEND}")
+
+        for name in _backends():
+            with _use_backend(name):
+                parse = _best(lambda: serializer.load_file(progress_path), args.repeat)
+                parse_cert = _best(lambda: serializer.load_file(cert_path), args.repeat)
+                enc_series = _best(lambda: [serializer.dumps(series) for _ in range(args.requests)], args.repeat)
+                enc_options = _best(lambda: [serializer.dumps(options) for _ in range(args.requests)], args.repeat)
+            results[name] = {
+                "parse_s": parse,
+                "parse_cert_s": parse_cert,
+                "series_rps": args.requests / enc_series,
+                "options_rps": args.requests / enc_options,
+            }
+            print(f"{name:7s} load_file={parse * 1000:8.1f}ms cert={parse_cert * 1000:7.1f}ms  "
+                  f"series_dumps={results[name]['series_rps']:>10,.0f}/s  "
+                  f"options_dumps={results[name]['options_rps']:>10,.0f}/s")
+
+    if "orjson" in results:
+        base, fast = results["json"], results["orjson"]
+        print(f"speedup parse x{base['parse_s'] / fast['parse_s']:.1f}, "
+              f"series x{fast['series_rps'] / base['series_rps']:.1f}, "
+              f"options x{fast['options_rps'] / base['options_rps']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
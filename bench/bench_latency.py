@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+bench/bench_latency.py
+
+역할:
+- 가짜 스냅샷(DATA_DIR)으로 uvicorn 서버를 띄우고 동시 접속 수를 늘려가며 요청 지연 p50/p99 측정
+- 대상: /progress/series, /progress/options, /progress/cert_table (방/닉네임 무작위)
+- 클라이언트는 표준 라이브러리 asyncio keep-alive HTTP/1.1(추가 의존성 없음)
+- --app 으로 다른 모듈(예: 이전 버전 main.py 복사본)을 지정해 같은 조건에서 비교 가능
+- --workers N --mmap 으로 멀티 워커 + 공유 .colbin(SNAPSHOT_MMAP) 모드 측정
+
+사용:
+  python bench/bench_latency.py --levels 1,8,32,128 --requests 2000
+  python bench/bench_latency.py --workers 4 --mmap
+"""
+
+import os, sys, argparse, asyncio, random, socket, subprocess, tempfile, time, statistics
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, proc: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited: {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5) as s:
+                s.sendall(b"GET /health HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+                if s.recv(64).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server not ready")
+
+
+async def _get(reader, writer, path: str) -> int:
+    """keep-alive 연결로 GET 1회, 상태 코드 반환(본문은 Content-Length만큼 읽고 버림)"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        k, _, v = line.partition(":")
+        if k.strip().lower() == "content-length":
+            length = int(v)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def _run_level(port: int, paths: list[str], concurrency: int, total: int) -> dict:
+    lat: list[float] = []
+    errors = 0
+    queue = iter(range(total))
+
+    async def client(seed: int):
+        nonlocal errors
+        rnd = random.Random(seed)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            for _ in queue:
+                t0 = time.perf_counter()
+                status = await _get(reader, writer, rnd.choice(paths))
+                lat.append(time.perf_counter() - t0)
+                if status != 200: errors += 1
+        finally:
+            writer.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    wall = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": len(lat) / wall,
+        "p50_ms": statistics.median(lat) * 1000,
+        "p99_ms": lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+
+def _request_paths(rooms: int, users: int, days: int) -> list[str]:
+    """synth 데이터의 (방, 닉네임) 쌍(= 인증 행)으로 요청 경로 목록 생성"""
+    pairs = sorted((r["opentalk_code"], r["nickname"]) for r in synth.iter_cert_rows(rooms, users, days))
+    codes = sorted({c for c, _ in pairs})
+    paths = [f"/progress/series?opentalk={quote(c)}&nickname={quote(n)}" for c, n in pairs]
+    paths += [f"/progress/options?opentalk={quote(c)}" for c in codes]
+    paths += [f"/progress/cert_table?opentalk={quote(c)}" for c in codes]
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--app", default="main:app", help="uvicorn 앱 경로(비교 대상 교체용)")
+    ap.add_argument("--levels", default="1,8,32,128", help="동시 접속 수 목록(쉼표 구분)")
+    ap.add_argument("--requests", type=int, default=2000, help="단계별 총 요청 수")
+    ap.add_argument("--rooms", type=int, default=50)
+    ap.add_argument("--users", type=int, default=30)
+    ap.add_argument("--days", type=int, default=120)
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn 워커 프로세스 수")
+    ap.add_argument("--mmap", action="store_true", help="SNAPSHOT_MMAP=true(워커 간 .colbin 공유)")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        synth.write_progress_snapshot(data_dir, args.rooms, args.users, args.days)
+        synth.write_cert_snapshot(data_dir, args.rooms, args.users, args.days)
+        paths = _request_paths(args.rooms, args.users, args.days)
+
+        port = _free_port()
+        env = dict(os.environ, DATA_DIR=data_dir, PUSH_ON_START="false",
+                   SNAPSHOT_MMAP="true" if args.mmap else "false")
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", args.app, "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            _wait_ready(port, proc)
+            print(f"app={args.app} workers={args.workers} mmap={args.mmap} paths={len(paths):,} requests/level={args.requests:,}")
+            for level in (int(x) for x in args.levels.split(",")):
+                r = asyncio.run(_run_level(port, paths, level, args.requests))
+                print(f"c={r['concurrency']:4d} rps={r['rps']:9,.0f} p50={r['p50_ms']:7.2f}ms "
+                      f"p99={r['p99_ms']:7.2f}ms errors={r['errors']}")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
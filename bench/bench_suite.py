@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""
+bench/bench_suite.py
+
+역할:
+- 합성 데이터(bench/synth.py)로 exporter → 스냅샷 적재 → API 처리량까지 한 번에 측정하고 결과를 JSON으로 기록
+  1) export: db.py 잡(JOBS)을 가짜 MySQL(커서가 synth 행을 fetchmany로 흘려줌)로 실행 → 잡별 행/초, MB/초, 단계별 시간
+     (--skip-export면 synth가 스냅샷을 직접 기록)
+  2) cold_load: main._build_entry로 데이터셋별 파싱+적재+인덱싱 시간, 행 수, 메모리(heap/mapped)
+  3) endpoints: 프로세스 내 ASGI 호출(소켓/uvicorn 없음)로 엔드포인트별 req/s, p50/p99, 평균 응답 바이트
+- 결과 파일(--out, 기본 bench/results/<시각>.json)은 --compare 로 이전 결과와 비교(지표별 배율 출력)
+- 가짜 MySQL은 이 스크립트 안에서만 sys.modules에 주입(실제 DB/mysql-connector 불필요)
+
+사용:
+  python bench/bench_suite.py --preset small
+  python bench/bench_suite.py --preset medium --requests 5000 --concurrency 32 --compare bench/results/base.json
+  python bench/bench_suite.py --rooms 2000 --users 200 --days 365 --skip-export --mmap
+  python bench/bench_suite.py --preset small --check-memory --requests 100   # 증분 export 메모리 회귀 확인
+"""
+
+import os, sys, re, argparse, asyncio, datetime, platform, random, subprocess, tempfile, time, types, statistics, tracemalloc
+from itertools import islice, dropwhile
+from urllib.parse import quote, unquote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth, serializer
+
+
+# -----------------------------
+# 가짜 MySQL(exporter 측정용)
+# -----------------------------
+
+def _install_fake_mysql(rooms: int, users: int, days: int, seed: int):
+    """
+    mysql.connector(pooling, Error)를 흉내 내는 모듈을 sys.modules에 등록(db.py import 전에 호출)
+    - information_schema 조회: synth 컬럼 구성으로 응답
+    - 그 외 SELECT: FROM 테이블에 맞는 synth 행 제너레이터(date/Decimal 타입)를 fetchmany로 반환
+    - keyset 청크 조회(WHERE (k...) > (%(k0)s, ...) ... LIMIT n): 직전 청크 끝에서 이어서 n행(재생성 없이)
+    """
+    tables = {
+        "json_study_user_progress": (synth.PROGRESS_COLUMNS, synth.iter_progress_rows),
+        "study_user_cert_wide": (synth.CERT_COLUMNS, synth.iter_cert_rows),
+    }
+
+    resume = {}  # 테이블 → (마지막으로 내준 키, 이어서 읽을 제너레이터)
+
+    class Error(Exception):
+        pass
+
+    class FakeCursor:
+        def __init__(self):
+            self._it = iter(())
+
+        def execute(self, query, params=None):
+            if "information_schema.columns" in query:
+                self._it = iter([{"TABLE_NAME": t, "COLUMN_NAME": c, "CREATE_TIME": None}
+                                 for t, (cols, _) in tables.items() for c in cols])
+            elif "information_schema.tables" in query:
+                self._it = iter([{"TABLE_NAME": t, "CREATE_TIME": None} for t in tables])
+            else:
+                m = re.search(r"\bFROM\s+(\w+)", query)
+                if not m or m.group(1) not in tables:
+                    raise Error(f"unknown table in query: {query[:80]}")
+                self._select(m.group(1), query, params or {})
+
+        def _select(self, table, query, params):
+            order = re.search(r"ORDER BY (.+?)(?: LIMIT \d+)?\s*$", query)
+            keys = [c.strip() for c in order.group(1).split(",")] if order else []
+            limit = re.search(r"LIMIT (\d+)\s*$", query)
+            after = tuple(params[f"k{i}"] for i in range(len(keys))) if "k0" in params else None
+            saved = resume.pop(table, None)
+            if after is not None and saved and saved[0] == after:
+                it = saved[1]
+            else:
+                it = tables[table][1](rooms, users, days, seed, db_types=True)
+                if after is not None:
+                    it = dropwhile(lambda r: tuple(r[c] for c in keys) <= after, it)
+            if not limit:
+                self._it = it
+                return
+            rows = list(islice(it, int(limit.group(1))))
+            if rows and keys:
+                resume[table] = (tuple(rows[-1][c] for c in keys), it)
+            self._it = iter(rows)
+
+        def fetchmany(self, size=1):
+            return list(islice(self._it, size))
+
+        def fetchall(self):
+            return list(self._it)
+
+        def close(self):
+            pass
+
+    class FakeConnection:
+        def cursor(self, **kwargs):
+            return FakeCursor()
+
+        def close(self):
+            pass
+
+    class MySQLConnectionPool:
+        def __init__(self, **kwargs):
+            pass
+
+        def get_connection(self):
+            return FakeConnection()
+
+    connector = types.ModuleType("mysql.connector")
+    pooling = types.ModuleType("mysql.connector.pooling")
+    pooling.MySQLConnectionPool = MySQLConnectionPool
+    connector.pooling, connector.Error = pooling, Error
+    mysql = types.ModuleType("mysql")
+    mysql.connector = connector
+    sys.modules.update({"mysql": mysql, "mysql.connector": connector, "mysql.connector.pooling": pooling})
+
+
+def bench_export(work_dir: str, rooms: int, users: int, days: int, seed: int) -> dict:
+    """work_dir/data에 db.py JOBS를 전체 조회로 실행(집계/샤드/압축본 포함) → 잡별 결과"""
+    _install_fake_mysql(rooms, users, days, seed)
+    for k in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"):
+        os.environ.setdefault(k, "bench")
+    os.environ["EXPORT_FULL_REFRESH"] = "true"
+    os.environ["EXPORT_PROFILE"] = "false"
+    os.environ["SCHEMA_CACHE_PATH"] = os.path.join(work_dir, ".schema_cache.json")
+    import db
+
+    out = {}
+    # db.py는 상대 경로(data/...)에 기록
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        for job in db.JOBS:
+            r = db._run_job(job)
+            if not r.ok:
+                raise RuntimeError(f"export {job.name} failed: {r.error}")
+            size = os.path.getsize(r.path)
+            rows = serializer.load_file(r.path)["row_count"]
+            out[job.name] = {
+                "seconds": round(r.seconds, 4),
+                "rows": rows,
+                "bytes": size,
+                "rows_per_s": round(rows / r.seconds, 1),
+                "mb_per_s": round(size / 1e6 / r.seconds, 2),
+                "stages": r.stages,
+            }
+            print(f"[export] {job.name}: {rows:,} rows {size / 1e6:.1f}MB {r.seconds:.2f}s "
+                  f"({out[job.name]['rows_per_s']:,.0f} rows/s) {db._format_stages(r.stages)}")
+    finally:
+        os.chdir(cwd)
+    return out
+
+
+def check_export_memory(work_dir: str, max_ratio: float = 1.5) -> dict:
+    """
+    메모리 회귀 확인: watermark 잡을 전체 조회 → 증분 조회 순으로 다시 실행해 파이썬 할당 피크(tracemalloc) 비교
+    - bench_export 이후 호출(work_dir/data에 기존 스냅샷이 있어야 증분 경로를 탐)
+    - 증분 피크가 전체 조회 피크의 max_ratio배를 넘으면 RuntimeError(증분 병합이 스냅샷 전체를 올리는 회귀)
+    """
+    import db
+
+    out = {}
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        for job in (j for j in db.JOBS if j.watermark):
+            peaks = {}
+            for mode, full in (("full", True), ("incremental", False)):
+                db.EXPORT_FULL_REFRESH = full
+                tracemalloc.start()
+                try:
+                    db.export_job(job)
+                    peaks[mode] = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+            ratio = peaks["incremental"] / max(1, peaks["full"])
+            out[job.name] = {"full_peak_mb": round(peaks["full"] / 1e6, 1),
+                             "incremental_peak_mb": round(peaks["incremental"] / 1e6, 1), "ratio": round(ratio, 2)}
+            print(f"[memory] {job.name}: full={peaks['full'] / 1e6:.1f}MB incremental={peaks['incremental'] / 1e6:.1f}MB x{ratio:.2f}")
+            if ratio > max_ratio:
+                raise RuntimeError(f"incremental export peak x{ratio:.2f} > x{max_ratio} of full export ({job.name})")
+    finally:
+        db.EXPORT_FULL_REFRESH = True
+        os.chdir(cwd)
+    return out
+
+
+# -----------------------------
+# 적재/엔드포인트(main.py, 프로세스 내)
+# -----------------------------
+
+def bench_cold_load(main) -> dict:
+    """데이터셋별로 캐시를 비운 뒤 _build_entry 1회(파싱 + Table 적재 + 인덱스)"""
+    out = {}
+    for path in main._TABLE_SPECS:
+        if not os.path.isfile(path):
+            continue
+        main._cache.pop(path, None)
+        t0 = time.perf_counter()
+        entry = main._build_entry(path, os.path.getmtime(path))
+        seconds = time.perf_counter() - t0
+        heap, mapped = entry["table"].nbytes()
+        name = os.path.basename(path)
+        out[name] = {"seconds": round(seconds, 4), "rows": len(entry["table"]), "file_bytes": os.path.getsize(path),
+                     "heap_bytes": heap, "mapped_bytes": mapped}
+        print(f"[cold] {name}: {len(entry['table']):,} rows {seconds:.3f}s heap={heap / 1e6:.1f}MB mapped={mapped / 1e6:.1f}MB")
+    return out
+
+
+async def asgi_get(app, url: str, headers: tuple = ()) -> tuple[int, bytes]:
+    """ASGI 앱에 GET 1회를 직접 호출(HTTP 서버/클라이언트 없이) → (상태 코드, 본문)"""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": unquote(path), "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"bench"), *headers], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    status, body, sent = 0, [], False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # 요청 본문은 끝, 연결 끊김은 보내지 않음
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(body)
+
+
+def _endpoint_paths(main, sample: int, seed: int = 5) -> dict[str, list[str]]:
+    """엔드포인트별 요청 경로 목록(방/닉네임 무작위 sample개, 스냅샷이 없는 엔드포인트는 제외)"""
+    rnd = random.Random(seed)
+    idx = main._load_entry(main.PROGRESS_JSON_PATH)["index"]
+    codes = rnd.sample(idx["codes"], min(sample, len(idx["codes"])))
+    pairs = [(c, rnd.choice(idx["nicknames"][c])) for c in (rnd.choice(idx["codes"]) for _ in range(sample))]
+    q = quote
+    paths = {
+        "options": [f"/progress/options?opentalk={q(c)}" for c in codes],
+        "series": [f"/progress/series?opentalk={q(c)}&nickname={q(n)}" for c, n in pairs],
+        "series_batch": [f"/progress/series/batch?opentalk={q(c)}" for c in codes],
+        "series_batch_matrix": [f"/progress/series/batch?opentalk={q(c)}&format=matrix" for c in codes],
+    }
+    if os.path.isfile(main.CERT_JSON_PATH):
+        paths["cert_table"] = [f"/progress/cert_table?opentalk={q(c)}&limit=20" for c in codes]
+    if os.path.isfile(main.ROOM_DAILY_JSON_PATH):
+        paths["room_daily"] = [f"/progress/room_daily?opentalk={q(c)}" for c in codes]
+    if os.path.isfile(main.RANK_DIST_JSON_PATH):
+        paths["rank_dist"] = [f"/progress/rank_dist?opentalk={q(c)}" for c in codes]
+    if os.path.isfile(main.DATA_PATH):
+        paths["chart_grouped"] = ["/chart_grouped"]
+        paths["test"] = ["/test?limit=100"]
+    return paths
+
+
+async def _run_endpoint(app, paths: list[str], total: int, concurrency: int, headers: tuple) -> dict:
+    lat: list[float] = []
+    nbytes = errors = 0
+    queue = iter(range(total))
+
+    async def client(seed: int):
+        nonlocal nbytes, errors
+        rnd = random.Random(seed)
+        for _ in queue:
+            t0 = time.perf_counter()
+            status, body = await asgi_get(app, rnd.choice(paths), headers)
+            lat.append(time.perf_counter() - t0)
+            nbytes += len(body)
+            if status != 200: errors += 1
+
+    # 첫 요청(미들웨어 스택 구성/캐시 적재)은 측정에서 제외
+    await asgi_get(app, paths[0], headers)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    wall = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "requests": len(lat),
+        "unique_paths": len(set(paths)),
+        "rps": round(len(lat) / wall, 1),
+        "p50_ms": round(statistics.median(lat) * 1000, 3),
+        "p99_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000, 3),
+        "avg_bytes": nbytes // max(1, len(lat)),
+        "errors": errors,
+    }
+
+
+def bench_endpoints(main, total: int, concurrency: int, sample: int, gzip: bool) -> dict:
+    headers = ((b"accept-encoding", b"gzip"),) if gzip else ()
+    out = {}
+    for name, paths in _endpoint_paths(main, sample).items():
+        r = out[name] = asyncio.run(_run_endpoint(main.app, paths, total, concurrency, headers))
+        print(f"[api] {name:20s} rps={r['rps']:9,.0f} p50={r['p50_ms']:7.2f}ms p99={r['p99_ms']:7.2f}ms "
+              f"bytes={r['avg_bytes']:,} errors={r['errors']}")
+    return out
+
+
+# -----------------------------
+# 결과 비교
+# -----------------------------
+
+# 지표별 "좋은 방향": 1이면 클수록 좋음, -1이면 작을수록 좋음
+_COMPARE_KEYS = {"rps": 1, "rows_per_s": 1, "mb_per_s": 1, "p50_ms": -1, "p99_ms": -1, "seconds": -1, "heap_bytes": -1}
+
+def compare(base: dict, cur: dict):
+    """같은 섹션/이름/지표끼리 cur/base 배율 출력(+는 개선)"""
+    for section in ("export", "cold_load", "endpoints"):
+        for name, now in cur.get(section, {}).items():
+            prev = base.get(section, {}).get(name)
+            if not prev:
+                continue
+            parts = []
+            for k, sign in _COMPARE_KEYS.items():
+                if prev.get(k) and now.get(k) is not None:
+                    ratio = now[k] / prev[k]
+                    better = ratio > 1 if sign > 0 else ratio < 1
+                    parts.append(f"{k} x{ratio:.2f}{'+' if better else '-' if ratio != 1 else ''}")
+            if parts:
+                print(f"[compare] {section}/{name}: {' '.join(parts)}")
+    if base.get("dataset") != cur.get("dataset"):
+        print("[compare] 주의: 데이터셋 크기가 다름", base.get("dataset"), "→", cur.get("dataset"))
+
+
+def _git_commit() -> str | None:
+    r = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return r.stdout.strip() or None
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--preset", choices=sorted(synth.PRESETS), default="small")
+    ap.add_argument("--rooms", type=int, help="프리셋 대신 방 수")
+    ap.add_argument("--users", type=int, help="프리셋 대신 방별 평균 인원")
+    ap.add_argument("--days", type=int, help="프리셋 대신 날짜 수")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--skip-export", action="store_true", help="db.py 대신 synth가 스냅샷을 직접 기록")
+    ap.add_argument("--check-memory", action="store_true", help="export 후 증분/전체 조회 메모리 피크 비교(회귀 시 실패)")
+    ap.add_argument("--requests", type=int, default=2000, help="엔드포인트별 요청 수")
+    ap.add_argument("--concurrency", type=int, default=16, help="동시 요청 수(이벤트 루프 안의 태스크)")
+    ap.add_argument("--sample", type=int, default=200, help="엔드포인트별 무작위 경로 수")
+    ap.add_argument("--gzip", action="store_true", help="Accept-Encoding: gzip 으로 요청")
+    ap.add_argument("--mmap", action="store_true", help="SNAPSHOT_MMAP=true(.colbin 공유 적재)")
+    ap.add_argument("--out", help="결과 JSON 경로(기본: bench/results/<시각>.json)")
+    ap.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = ap.parse_args()
+
+    rooms, users, days = synth.PRESETS[args.preset]
+    rooms, users, days = args.rooms or rooms, args.users or users, args.days or days
+    started = datetime.datetime.now()
+    out_path = os.path.abspath(args.out or os.path.join(ROOT, "bench", "results", started.strftime("%Y%m%d-%H%M%S") + ".json"))
+    result = {
+        "meta": {"started_at": started.isoformat(timespec="seconds"), "git_commit": _git_commit(),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "serializer": serializer.BACKEND, "args": vars(args)},
+        "dataset": {"rooms": rooms, "users": users, "days": days, "seed": args.seed},
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_dir = os.path.join(work_dir, "data")
+        print(f"dataset rooms={rooms:,} users/room≈{users:,} days={days:,} work={work_dir}")
+        if args.skip_export:
+            t0 = time.perf_counter()
+            synth.write_snapshots(data_dir, rooms, users, days, args.seed)
+            print(f"[synth] snapshots {time.perf_counter() - t0:.2f}s")
+        else:
+            result["export"] = bench_export(work_dir, rooms, users, days, args.seed)
+            if args.check_memory:
+                result["export_memory"] = check_export_memory(work_dir)
+            synth._write(data_dir, "progress.json", {"rows": synth.chart_rows(days), "row_count": days * 4})
+
+        # main.py는 import 시점에 DATA_DIR/SNAPSHOT_*를 읽음
+        os.environ.update(DATA_DIR=data_dir, SNAPSHOT_WATCH="false", PUSH_ON_START="false",
+                          SNAPSHOT_MMAP="true" if args.mmap else "false")
+        import main
+        result["cold_load"] = bench_cold_load(main)
+        result["endpoints"] = bench_endpoints(main, args.requests, args.concurrency, args.sample, args.gzip)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "wb") as f:
+        f.write(serializer.dumps(result))
+    print(f"[OK] results → {out_path}")
+    if args.compare:
+        compare(serializer.load_file(args.compare), result)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+bench/loadtest_cold.py
+
+역할:
+- 캐시가 빈 상태에서 동시 요청 N개가 같은 스냅샷을 요청할 때
+  single-flight(main._load_entry) vs 요청마다 각자 파싱(main._build_entry) 비교
+- 지표: 요청 지연 p50/p99/max, 전체 소요, 파이썬 메모리 피크(tracemalloc), 파싱 횟수
+- check_single_flight: 동시 miss + 리더가 끝난 직후 도착한 miss에서도 파싱이 1회뿐인지 확인(아니면 실패)
+
+사용:
+  python bench/loadtest_cold.py --concurrency 50 --rooms 100 --users 50 --days 120
+"""
+
+import os, sys, argparse, tempfile, threading, time, tracemalloc, statistics
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth
+
+
+@contextmanager
+def _count_parses(main):
+    """블록 안에서 main._parse_table 호출 수를 셈 → {"n": 횟수}"""
+    counter = {"n": 0}
+    orig = main._parse_table
+
+    def counted(*a, **kw):
+        counter["n"] += 1
+        return orig(*a, **kw)
+
+    main._parse_table = counted
+    try:
+        yield counter
+    finally:
+        main._parse_table = orig
+
+
+def check_single_flight(main, concurrency: int) -> int:
+    """
+    캐시를 비우고 concurrency개 스레드가 동시에 miss(_build_once 직접 호출) → 이어서 한발 늦은 miss 1건
+    (캐시 확인은 리더가 끝나기 전, 락은 끝난 뒤에 잡은 요청) → 파싱은 전부 합쳐 1회여야 함
+    """
+    path = main.PROGRESS_JSON_PATH
+    mtime = os.path.getmtime(path)
+    main._cache.clear()
+    main._invalidate_responses(path)
+    barrier = threading.Barrier(concurrency)
+
+    def worker():
+        barrier.wait()
+        main._build_once(path, mtime)
+
+    with _count_parses(main) as parses:
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        main._build_once(path, mtime)
+    if parses["n"] != 1:
+        raise RuntimeError(f"single-flight: {parses['n']} parses for {concurrency + 1} concurrent misses (expected 1)")
+    print(f"single-flight check: {concurrency + 1} misses → 1 parse")
+    return parses["n"]
+
+
+def run(main, mode: str, concurrency: int) -> dict:
+    """캐시를 비우고 concurrency개 스레드가 동시에 cold 로드"""
+    path = main.PROGRESS_JSON_PATH
+    main._cache.clear()
+    main._invalidate_responses(path)
+    barrier = threading.Barrier(concurrency)
+    lat = []
+    lock = threading.Lock()
+
+    def worker():
+        barrier.wait()
+        t0 = time.perf_counter()
+        if mode == "single-flight":
+            main._load_entry(path)
+        else:
+            main._build_entry(path, os.path.getmtime(path))
+        dt = time.perf_counter() - t0
+        with lock:
+            lat.append(dt)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with _count_parses(main) as parses:
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+    wall = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    lat.sort()
+    return {
+        "mode": mode,
+        "wall_s": wall,
+        "p50_ms": statistics.median(lat) * 1000,
+        "p99_ms": lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000,
+        "max_ms": lat[-1] * 1000,
+        "peak_mb": peak / 1e6,
+        "parses": parses["n"],
+    }
+
+
+def main_():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--rooms", type=int, default=50)
+    ap.add_argument("--users", type=int, default=30)
+    ap.add_argument("--days", type=int, default=120)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = synth.write_progress_snapshot(data_dir, args.rooms, args.users, args.days)
+        print(f"snapshot={os.path.getsize(path) / 1e6:.1f}MB concurrency={args.concurrency}")
+
+        # main.py는 import 시점에 DATA_DIR을 읽음
+        os.environ["DATA_DIR"] = data_dir
+        os.environ["SNAPSHOT_WATCH"] = "false"
+        import main
+
+        for mode in ("no-guard", "single-flight"):
+            r = run(main, mode, args.concurrency)
+            print(f"{r['mode']:14s} wall={r['wall_s']:6.2f}s p50={r['p50_ms']:8.1f}ms "
+                  f"p99={r['p99_ms']:8.1f}ms max={r['max_ms']:8.1f}ms peak={r['peak_mb']:8.1f}MB parses={r['parses']}")
+        check_single_flight(main, args.concurrency)
+
+
+if __name__ == "__main__":
+    main_()
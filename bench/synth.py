@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+bench/synth.py
+
+역할:
+- 실제 카디널리티에 가까운 가짜 study_progress / study_cert / progress.json 데이터 생성(벤치마크 공용)
+  - 방 수천 개, 방마다 닉네임 수십~수백 명(편차 있음), 1년치 날짜
+  - 사람마다 시작일이 다르고(중간 합류), 진도율은 정체 구간이 섞여 단조 증가
+- 행 생성은 제너레이터 → 큰 규모도 메모리 일정(가짜 DB 커서/스트리밍 기록에 그대로 사용)
+- db_types=True면 MySQL 커넥터가 돌려주는 타입(date, Decimal)으로 생성(exporter 벤치용)
+- bench_suite / bench_json / loadtest_cold / bench_latency가 모두 이 모듈만 사용(스키마는 db.py JOBS와 같음)
+
+프리셋(rooms, users/방 평균, days):
+  small  =   50,  30,  90   (~10만 행)
+  medium =  300, 100, 180   (~400만 행)
+  full   = 2000, 200, 365   (~1억 행, 대용량 장비 전용)
+"""
+
+import os, sys, random, datetime
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import columnar, serializer
+
+PRESETS = {
+    "small": (50, 30, 90),
+    "medium": (300, 100, 180),
+    "full": (2000, 200, 365),
+}
+
+COURSES = ["영어", "기초", "구동"]
+START = datetime.date(2025, 1, 1)
+
+# db.py JOBS와 같은 컬럼 구성
+PROGRESS_COLUMNS = ["opentalk_code", "nickname", "study_group_title", "progress_date", "progress"]
+CERT_COLUMNS = ["opentalk_code", "nickname", "user_rank", "cert_days_count", "average_week"]
+
+
+def room_code(r: int) -> str:
+    """방 번호 → 실제와 비슷한 코드(예: 2403영어07), r < 12000까지 고유"""
+    return f"{24 + r // 1200 % 10}{r // 100 % 12 + 1:02d}{COURSES[r % len(COURSES)]}{r % 100:02d}"
+
+
+def room_sizes(rooms: int, users: int, seed: int = 7) -> list[int]:
+    """방별 인원(평균 users, 0.5x ~ 1.5x 편차)"""
+    rnd = random.Random(seed)
+    return [max(1, int(users * rnd.uniform(0.5, 1.5))) for _ in range(rooms)]
+
+
+def room_order(rooms: int) -> list[int]:
+    """방 번호를 코드 문자열 순으로(db.py JOBS의 ORDER BY와 같은 순서로 생성하기 위함)"""
+    return sorted(range(rooms), key=room_code)
+
+
+def iter_progress_rows(rooms: int, users: int, days: int, seed: int = 7, db_types: bool = False):
+    """(opentalk_code, nickname, study_group_title, progress_date) 순으로 정렬된 행 제너레이터"""
+    rnd = random.Random(seed)
+    dates = [START + datetime.timedelta(days=d) for d in range(days)]
+    sizes = room_sizes(rooms, users, seed)
+    for r in room_order(rooms):
+        size = sizes[r]
+        code = room_code(r)
+        course = COURSES[r % len(COURSES)]
+        for u in range(size):
+            nick = f"user{r:05d}_{u:03d}"
+            first = rnd.randrange(max(1, days // 3))
+            speed = rnd.uniform(0.2, 1.5)
+            p = 0.0
+            for d in range(first, days):
+                if rnd.random() > 0.25:  # 25%는 그날 진도 없음(정체)
+                    p = min(100.0, p + rnd.random() * speed)
+                prog = f"{p:.2f}"
+                yield {
+                    "opentalk_code": code,
+                    "nickname": nick,
+                    "study_group_title": f"{course} {d // 30 + 1:02d}주차",
+                    "progress_date": dates[d] if db_types else dates[d].isoformat(),
+                    "progress": Decimal(prog) if db_types else prog,
+                }
+
+
+def iter_cert_rows(rooms: int, users: int, days: int, seed: int = 7, db_types: bool = False):
+    """방/닉네임마다 인증 1행(랭크는 방 안에서 1..N, 일부는 랭크 없음), (opentalk_code, nickname) 순"""
+    rnd = random.Random(seed + 1)
+    sizes = room_sizes(rooms, users, seed)
+    for r in room_order(rooms):
+        size = sizes[r]
+        code = room_code(r)
+        ranks = list(range(1, size + 1))
+        rnd.shuffle(ranks)
+        for u in range(size):
+            cert_days = rnd.randrange(days + 1)
+            avg = round(cert_days / max(1, days / 7), 2)
+            yield {
+                "opentalk_code": code,
+                "nickname": f"user{r:05d}_{u:03d}",
+                "user_rank": ranks[u] if rnd.random() > 0.05 else None,
+                "cert_days_count": cert_days,
+                "average_week": Decimal(str(avg)) if db_types else avg,
+            }
+
+
+def chart_rows(days: int) -> list[dict]:
+    """progress.json(/chart, /chart_grouped)용 그룹 × 날짜 행"""
+    rnd = random.Random(3)
+    out = []
+    for g in ("A", "B", "C", "D"):
+        total = rnd.randint(50, 300)
+        inc = 0
+        for d in range(days):
+            inc = min(total, inc + rnd.randint(0, 5))
+            out.append({"progress_date": (START + datetime.timedelta(days=d)).isoformat(), "study_group_title": g,
+                        "rate": round(inc / total * 100, 2), "increased_users": inc, "total_users": total})
+    return out
+
+
+def write_snapshots(data_dir: str, rooms: int, users: int, days: int, seed: int = 7) -> dict:
+    """
+    DATA_DIR에 main.py가 읽는 스냅샷들을 직접 기록(db.py 없이) → {이름: 경로}
+    - study_progress: 컬럼형(db.py study_progress 잡과 같은 dict_columns)
+    - study_cert / progress.json: 행 형식
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    chart = chart_rows(days)
+    return {
+        "study_progress": write_progress_snapshot(data_dir, rooms, users, days, seed),
+        "study_cert": write_cert_snapshot(data_dir, rooms, users, days, seed),
+        "progress": _write(data_dir, "progress.json", {"rows": chart, "row_count": len(chart)}),
+    }
+
+
+def write_progress_snapshot(data_dir: str, rooms: int, users: int, days: int, seed: int = 7) -> str:
+    """study_progress.json(컬럼형, db.py study_progress 잡과 같은 dict_columns) 기록 → 경로"""
+    n, cols = columnar.encode(iter_progress_rows(rooms, users, days, seed), PROGRESS_COLUMNS[:4])
+    return _write(data_dir, "study_progress.json", {"format": columnar.FORMAT, "columns": cols, "row_count": n})
+
+
+def write_cert_snapshot(data_dir: str, rooms: int, users: int, days: int, seed: int = 7) -> str:
+    """study_cert.json(행 형식) 기록 → 경로"""
+    cert = list(iter_cert_rows(rooms, users, days, seed))
+    return _write(data_dir, "study_cert.json", {"rows": cert, "row_count": len(cert)})
+
+
+def _write(data_dir: str, name: str, obj: dict) -> str:
+    path = os.path.join(data_dir, name)
+    with open(path, "wb") as f:
+        f.write(serializer.dumps(obj))
+    return path
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+columnar.py
+
+역할:
+- 행(dict) 목록 ↔ 컬럼형 스냅샷 변환(db.py export, main.py 로드에서 공통 사용)
+
+컬럼형 형식(data/{name}.json의 "columns"):
+{
+  "format": "columnar",
+  "columns": {
+    "opentalk_code": {"dict": ["2409영어", "2410기초"], "codes": [0, 0, 1, ...]},   # 사전 인코딩
+    "progress": ["12.50", "13.00", ...]                                              # 일반 배열
+  },
+  "row_count": N
+}
+- 반복이 많은 문자열 컬럼(방 코드/닉네임/그룹명/날짜)은 사전 인코딩 → 파일 크기/파싱 시간 감소
+- 사전 인코딩 컬럼은 정수 코드로 바로 필터/그룹핑 가능
+- Table: 위 형식(또는 행 배열)을 array 기반 메모리 테이블로 적재(main.py 캐시용)
+- Table.save / Table.open: 읽기 전용 바이너리(.colbin)로 저장 → 여러 프로세스가 mmap으로 공유
+
+바이너리 형식(.colbin, 네이티브 바이트 순서):
+  [0:8]   매직 b"COLBIN1\n"
+  [8:16]  헤더 길이(u64, little-endian)
+  [16:]   헤더 JSON {"n", "byteorder", "meta", "columns": {이름: {"kind": "dict"|"float", "dict"?, "offset", "length"}}}
+  이후    8바이트 정렬된 데이터 블록(dict → int32 코드, float → float64), offset은 데이터 시작 기준
+"""
+
+import os, sys, mmap, struct
+from array import array
+
+import serializer
+
+FORMAT = "columnar"
+BINARY_EXT = ".colbin"
+BINARY_MAGIC = b"COLBIN1\n"
+
+
+def encode(rows, dict_columns: list[str] | None = None) -> tuple[int, dict]:
+    """
+    rows(이터러블) → (행 수, columns dict)
+    - 컬럼 순서/구성은 첫 행 기준(이후 행에 없는 키는 None)
+    - dict_columns에 든 컬럼은 등장 순서대로 사전 인코딩
+    """
+    dict_columns = set(dict_columns or ())
+    names: list[str] | None = None
+    values: dict[str, list] = {}
+    lookup: dict[str, dict] = {}
+    n = 0
+    for row in rows:
+        if names is None:
+            names = list(row.keys())
+            for c in names:
+                values[c] = []
+                if c in dict_columns:
+                    lookup[c] = {}
+        for c in names:
+            v = row.get(c)
+            if c in lookup:
+                d = lookup[c]
+                code = d.get(v)
+                if code is None:
+                    code = d[v] = len(d)
+                values[c].append(code)
+            else:
+                values[c].append(v)
+        n += 1
+
+    columns = {}
+    for c in names or ():
+        if c in lookup:
+            columns[c] = {"dict": list(lookup[c]), "codes": values[c]}
+        else:
+            columns[c] = values[c]
+    return n, columns
+
+
+def is_columnar(data) -> bool:
+    return isinstance(data, dict) and data.get("format") == FORMAT and isinstance(data.get("columns"), dict)
+
+
+def dict_column(data: dict, name: str) -> tuple[list, list[int]]:
+    """
+    컬럼을 (사전, 코드 배열)로 반환. 일반 배열 컬럼이면 그 자리에서 사전 인코딩
+    - 컬럼이 없으면 ([None], [0] * row_count)
+    """
+    col = data["columns"].get(name)
+    if isinstance(col, dict):
+        return col["dict"], col["codes"]
+    if col is None:
+        return [None], [0] * int(data.get("row_count") or 0)
+    d: dict = {}
+    codes = [d.setdefault(v, len(d)) for v in col]
+    return list(d), codes
+
+
+def column(data: dict, name: str) -> list:
+    """컬럼을 값 배열로 반환(사전 인코딩이면 디코딩). 컬럼이 없으면 None 배열"""
+    col = data["columns"].get(name)
+    if isinstance(col, dict):
+        d = col["dict"]
+        return [d[i] for i in col["codes"]]
+    if col is None:
+        return [None] * int(data.get("row_count") or 0)
+    return col
+
+
+def to_rows(data: dict) -> list[dict]:
+    """컬럼형 스냅샷 → 행(dict) 목록(행 형식만 다루는 기존 코드 호환용)"""
+    names = list(data["columns"])
+    cols = [column(data, c) for c in names]
+    return [dict(zip(names, vals)) for vals in zip(*cols)]
+
+
+class Table:
+    """
+    메모리 상주용 컬럼형 테이블(행 dict 대신 array 기반, main.py 스냅샷 캐시용)
+    - 기본: 사전 인코딩(값 목록 + array('i') 코드). 문자열 값은 sys.intern으로 공유
+    - floats에 든 컬럼: array('d')로 1회 변환(None/변환 실패 → NaN)
+    - normalize: {컬럼: 함수} — 사전 값마다 1회만 호출(strip, 날짜 정규화 등)
+    """
+    __slots__ = ("n", "names", "_dict", "_float", "_mmap")
+
+    def __init__(self, data, normalize: dict | None = None, floats: dict | None = None):
+        """data: 로드한 스냅샷(행 배열 / {"rows"} / 컬럼형), floats: {컬럼: 값→float|None 변환 함수}"""
+        if not is_columnar(data):
+            rows = data if isinstance(data, list) else (data.get("rows") or [])
+            n, columns = encode(rows, list(rows[0]) if rows else [])
+            data = {"columns": columns, "row_count": n}
+        normalize = normalize or {}
+        floats = floats or {}
+        self.names = list(data["columns"])
+        self._dict: dict[str, tuple[list, array, dict]] = {}
+        self._float: dict[str, array] = {}
+        self._mmap = None
+        self.n = 0
+        for name in self.names:
+            values, codes = dict_column(data, name)
+            self.n = len(codes)
+            if name in floats:
+                conv = [floats[name](v) for v in values]
+                nan = float("nan")
+                self._float[name] = array("d", (nan if conv[c] is None else conv[c] for c in codes))
+                continue
+            norm = normalize.get(name)
+            out, pos, remap = [], {}, []
+            for v in values:
+                if norm: v = norm(v)
+                if isinstance(v, str): v = sys.intern(v)
+                j = pos.get(v)
+                if j is None:
+                    j = pos[v] = len(out)
+                    out.append(v)
+                remap.append(j)
+            self._dict[name] = (out, array("i", (remap[c] for c in codes)), pos)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def nbytes(self) -> tuple[int, int]:
+        """
+        대략적 메모리 사용량 (힙 bytes, mmap 공유 bytes)
+        - 힙: array 버퍼 + 사전 값 목록/문자열, mmap: Table.open으로 매핑된 컬럼 버퍼
+        """
+        heap = mapped = 0
+        for values, codes, _ in self._dict.values():
+            heap += sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+            if isinstance(codes, memoryview): mapped += codes.nbytes
+            else: heap += codes.itemsize * len(codes)
+        for col in self._float.values():
+            if isinstance(col, memoryview): mapped += col.nbytes
+            else: heap += col.itemsize * len(col)
+        return heap, mapped
+
+    def dict_col(self, name: str) -> tuple[list, array]:
+        """사전 인코딩 컬럼 → (값 목록, 코드 array). 없는 컬럼은 전부 None(value()와 같은 규칙)"""
+        col = self._dict.get(name)
+        if col is None:
+            return [None], array("i", [0]) * len(self)
+        return col[0], col[1]
+
+    def float_col(self, name: str) -> array:
+        """float 컬럼 → array('d')(결측 NaN). 없는 컬럼은 전부 NaN"""
+        col = self._float.get(name)
+        if col is None:
+            return array("d", [float("nan")]) * len(self)
+        return col
+
+    def lookup(self, name: str, value) -> int | None:
+        """사전 인코딩 컬럼에서 value의 정수 코드(없으면 None)"""
+        col = self._dict.get(name)
+        return col[2].get(value) if col else None
+
+    def value(self, name: str, i: int):
+        """i번째 행의 name 값(float 컬럼 NaN → None)"""
+        if name in self._float:
+            v = self._float[name][i]
+            return None if v != v else v
+        col = self._dict.get(name)
+        return col[0][col[1][i]] if col else None
+
+    def row(self, i: int, names=None) -> dict:
+        return {name: self.value(name, i) for name in (self.names if names is None else names)}
+
+    def rows(self, indices=None, names=None) -> list[dict]:
+        """행 dict 목록으로 복원(indices: 해당 행만, names: 해당 컬럼만) — 응답 생성 시 필요한 만큼만 사용"""
+        return [self.row(i, names) for i in (range(self.n) if indices is None else indices)]
+
+    def save(self, path: str, meta: dict | None = None):
+        """
+        .colbin으로 저장(임시 파일 → os.replace라 읽는 쪽은 항상 완성본만 봄)
+        - 정규화/float 변환이 끝난 값을 그대로 기록 → open 시 재변환 없음
+        """
+        columns, blocks, off = {}, [], 0
+        for name in self.names:
+            if name in self._float:
+                columns[name] = {"kind": "float"}
+                raw = self._float[name].tobytes()
+            else:
+                values, codes, _ = self._dict[name]
+                columns[name] = {"kind": "dict", "dict": values}
+                raw = codes.tobytes()
+            columns[name].update(offset=off, length=len(raw))
+            pad = -len(raw) % 8
+            blocks.append(raw + b"\0" * pad)
+            off += len(raw) + pad
+        header = serializer.dumps({"n": self.n, "byteorder": sys.byteorder, "meta": meta or {}, "columns": columns})
+        header += b" " * (-(16 + len(header)) % 8)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(BINARY_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for b in blocks:
+                f.write(b)
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path: str) -> tuple["Table", dict]:
+        """
+        .colbin을 mmap(읽기 전용)으로 열어 (Table, meta) 반환
+        - 코드/float 컬럼은 매핑 위 memoryview(복사 없음, 프로세스 간 페이지 캐시 공유)
+        - 사전 값 목록/역색인만 프로세스마다 생성(고유값 수만큼)
+        - 형식이 다르면 ValueError
+        """
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:8] != BINARY_MAGIC:
+            mm.close()
+            raise ValueError(f"not a {BINARY_EXT} file: {path}")
+        hlen = struct.unpack_from("<Q", mm, 8)[0]
+        header = serializer.loads(mm[16:16 + hlen])
+        if header.get("byteorder") != sys.byteorder:
+            mm.close()
+            raise ValueError(f"byte order mismatch: {path}")
+        base = 16 + hlen
+        view = memoryview(mm)
+        t = cls.__new__(cls)
+        t.n = header["n"]
+        t.names = list(header["columns"])
+        t._dict, t._float, t._mmap = {}, {}, mm
+        for name, col in header["columns"].items():
+            start = base + col["offset"]
+            buf = view[start:start + col["length"]]
+            if col["kind"] == "float":
+                t._float[name] = buf.cast("d")
+            else:
+                values = [sys.intern(v) if isinstance(v, str) else v for v in col["dict"]]
+                t._dict[name] = (values, buf.cast("i"), {v: i for i, v in enumerate(values)})
+        return t, header.get("meta") or {}
@@ -15,14 +15,47 @@ db.py
 - SnapshotJob에 ORDER BY 지원(diff 안정성)
 - 환경변수 필수값 검증
 - allow_empty 커밋 옵션 실제 반영
+- 스냅샷 export를 스트리밍 방식으로 변경(fetchmany 배치 → .tmp에 바로 기록, 행 수와 무관하게 메모리 일정)
+- JOBS를 커넥션 풀 크기만큼 병렬 실행(잡별 소요시간 기록, 한 잡 실패가 다른 잡을 중단시키지 않음)
+- 증분(delta) 스냅샷: watermark 컬럼 이후 행만 조회해 기존 스냅샷에 키 기준 병합
+  (기존 스냅샷이 EXPORT_INCREMENTAL_MAX_MB보다 크면 병합 대신 전체 스트리밍 조회 → 메모리 일정)
+- rows 내용 해시(rows_sha256)로 변경 감지: 내용이 같으면 파일을 그대로 두고 커밋/푸시도 생략
+- JSON 직렬화는 serializer.py 경유(orjson 있으면 빠른 경로, 없으면 표준 json; 출력은 compact)
+- 방(opentalk_code)별 샤드 파일 + manifest 생성(정적 클라이언트가 선택한 방만 받도록)
+  (export 행 스트림에서 방 코드가 바뀔 때마다 바로 기록 → 스냅샷을 다시 읽어 행 dict로 펼치지 않음)
+- 스냅샷과 함께 .json.gz(옵션: .json.br) 사전압축본을 같은 교체 단계에서 생성
+  (sidecar .json.src에 원본 size + rows_sha256 기록, 압축을 끄면 옛 압축본/sidecar 삭제)
+- 컬럼형 스냅샷 형식 옵션(컬럼별 배열 + 반복 문자열 사전 인코딩, columnar.py)
+  (컬럼 값은 배치마다 임시 spool 파일로 내보내고 마지막에 이어 붙임 → 메모리는 사전 값 목록만큼)
+- 집계(파생) 잡: export 직후 원본 스냅샷에서 방별 일자 롤업/랭크 분포를 계산해 작은 스냅샷으로 기록
+- 컬럼 검증용 information_schema 조회를 JOBS 전체 1회로 묶고 디스크에 캐시(TTL + CREATE_TIME 비교)
+- 실행 리포트(run_report.json): 잡별 단계(query/fetch/serialize/validate/compress/...) 시간·바이트 + git push 시간
+  EXPORT_PROFILE=true면 잡을 순차 실행하며 잡별 cProfile(.prof) + 단계별 tracemalloc 피크도 기록
+- 교체 전 검증을 전체 재파싱 대신 기록 중 계산한 파일 sha256 + 머리/꼬리 구조 확인으로(메모리 일정)
+- 대용량 잡 청크 조회(chunk_size): order_by 컬럼 keyset 페이지네이션으로 짧은 쿼리 여러 번, 재시도는 청크 단위
 """
 
-import os, json, subprocess, datetime, time
+import os, re, gzip, shutil, hashlib, subprocess, datetime, time, sys, threading, tempfile
+import cProfile, tracemalloc
+from bisect import bisect_right
+from collections import Counter
+from contextlib import contextmanager
+from math import fsum
 from pathlib import Path
-from dataclasses import dataclass
+from typing import Callable
+from array import array
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from mysql.connector import pooling, Error
 import zoneinfo
+import serializer
+import columnar
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성(.json.br 생성용)
+    brotli = None
 
 
 load_dotenv()
@@ -37,10 +70,41 @@ SEOUL_TZ = zoneinfo.ZoneInfo("Asia/Seoul")
 # 스냅샷 디렉토리/패턴(여기 패턴을 .gitattributes와 충돌 자동해결에 사용)
 SNAPSHOT_DIR = "data"
 SNAPSHOT_GLOB = f"{SNAPSHOT_DIR}/*.json"
+# 샤드 디렉토리(data/{name}/*.json)도 같은 머지 전략 적용
+SHARD_GLOB = f"{SNAPSHOT_DIR}/*/*.json"
+SHARD_MANIFEST = "manifest.json"
+# 사전압축본(바이너리라 병합 불가 → 역시 ours)
+COMPRESSED_GLOBS = [f"{SNAPSHOT_DIR}/*.json.gz", f"{SNAPSHOT_DIR}/*.json.br"]
+# 압축본 sidecar({"size", "rows_sha256"}: 압축본을 만든 원본) → main.py가 원본과 맞을 때만 압축본 전송
+COMPRESSED_SOURCE_EXT = ".src"
+COMPRESSED_SOURCE_GLOB = f"{SNAPSHOT_DIR}/*.json{COMPRESSED_SOURCE_EXT}"
 
 # 기본 브랜치(환경변수로 덮어쓰기 가능)
 GIT_BRANCH = os.getenv("GIT_BRANCH", "main")
 
+# 스트리밍 export 시 fetchmany 1회당 가져올 행 수
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+# true면 증분 잡도 전체 재조회(원본에서 삭제된 행 정리 등 주기적 전체 갱신용)
+EXPORT_FULL_REFRESH = os.getenv("EXPORT_FULL_REFRESH", "false").strip().lower() in ("1", "true", "yes", "y")
+
+# 증분 병합은 기존 스냅샷 전체를 행 dict로 올림(파일 크기의 약 30배 메모리) → 이보다 큰 스냅샷(MB)은
+# 전체 스트리밍/청크 조회로 대체(메모리 일정). 기본 2MB ≈ 청크 전체 조회의 피크 수준
+EXPORT_INCREMENTAL_MAX_MB = float(os.getenv("EXPORT_INCREMENTAL_MAX_MB", "2"))
+
+# 사전압축본 생성 여부(.gz 기본 on, .br은 brotli 패키지가 있을 때만)
+EXPORT_GZIP = os.getenv("EXPORT_GZIP", "true").strip().lower() in ("1", "true", "yes", "y")
+EXPORT_BROTLI = os.getenv("EXPORT_BROTLI", "false").strip().lower() in ("1", "true", "yes", "y") and brotli is not None
+
+# 실행 리포트 경로 / 프로파일 모드(잡 순차 실행 + cProfile + tracemalloc)
+RUN_REPORT_PATH = os.getenv("RUN_REPORT_PATH", "run_report.json")
+EXPORT_PROFILE = os.getenv("EXPORT_PROFILE", "false").strip().lower() in ("1", "true", "yes", "y")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# 컬럼 검증용 스키마 캐시(파일 위치/유효시간 초). TTL 안에서는 DB 조회 없음
+SCHEMA_CACHE_PATH = os.getenv("SCHEMA_CACHE_PATH", ".schema_cache.json")
+SCHEMA_CACHE_TTL = int(os.getenv("SCHEMA_CACHE_TTL", "86400"))
+
 # -----------------------------
 # Snapshot Job 정의
 # -----------------------------
@@ -55,6 +119,14 @@ class SnapshotJob:
     - where: WHERE 절 문자열(옵션)
     - order_by: ORDER BY 절 문자열(옵션; diff 안정성 위해 권장)
     - limit: LIMIT 개수(옵션; 대용량 방지 위해 권장)
+    - watermark: 증분 기준 컬럼(옵션). 지정 시 기존 스냅샷의 최댓값 이후 행만 조회해 병합
+    - lookback_days: watermark 기준으로 다시 조회할 일수(늦게 들어온/수정된 행 보정)
+    - key: 병합 기준 기본키 컬럼들(예: "opentalk_code, nickname, progress_date"). watermark 사용 시 필수
+    - shard_by: 샤드 기준 컬럼(옵션). 지정 시 data/{name}/manifest.json + 값별 샤드 파일도 생성
+    - format: "rows"(기본, 행 dict 배열) 또는 "columnar"(컬럼별 배열, columnar.py 참고)
+    - dict_columns: columnar일 때 사전 인코딩할 컬럼들(반복이 많은 문자열 컬럼 권장)
+    - chunk_size: 지정 시 전체 조회를 order_by 컬럼 keyset 페이지네이션으로 chunk_size행씩 나눠 실행
+      (order_by는 오름차순·NULL 없음·행마다 고유해야 함 → key와 같은 컬럼 권장, 해당 컬럼 인덱스 필요)
     """
     name: str
     select: str
@@ -62,6 +134,27 @@ class SnapshotJob:
     where: str | None = None
     order_by: str | None = None
     limit: int | None = None
+    watermark: str | None = None
+    lookback_days: int = 0
+    key: str | None = None
+    shard_by: str | None = None
+    format: str = "rows"
+    dict_columns: str | None = None
+    chunk_size: int | None = None
+
+@dataclass
+class AggregateJob:
+    """
+    원본 스냅샷 1건에서 파생되는 집계 스냅샷(DB 재조회 없이 원본 export 직후 계산)
+    - name: 생성 파일명(확장자 제외). 결과는 data/{name}.json(행 형식)
+    - source: 원본 SnapshotJob 이름(원본 내용이 바뀐 실행에서만 다시 계산)
+    - build: columnar.Table → 집계 행 목록 함수
+    - floats: Table 적재 시 float로 변환할 원본 컬럼들(결측/변환 실패 → NaN)
+    """
+    name: str
+    source: str
+    build: Callable[[columnar.Table], list[dict]]
+    floats: str | None = None
 
 # ↓↓↓↓ 이 목록만 수정하면 됩니다. ↓↓↓↓
 JOBS: list[SnapshotJob] = [
@@ -69,13 +162,21 @@ JOBS: list[SnapshotJob] = [
         name="study_progress",
         select="opentalk_code, nickname, study_group_title, progress_date, progress",
         from_="json_study_user_progress",
-        order_by="opentalk_code, nickname, study_group_title, progress_date"
+        order_by="opentalk_code, nickname, study_group_title, progress_date",
+        watermark="progress_date",
+        lookback_days=3,
+        key="opentalk_code, nickname, study_group_title, progress_date",
+        shard_by="opentalk_code",
+        format="columnar",
+        dict_columns="opentalk_code, nickname, study_group_title, progress_date",
+        chunk_size=100000
     ),
     SnapshotJob(
         name="study_cert",
         select="opentalk_code, nickname, user_rank, cert_days_count, average_week",
         from_="study_user_cert_wide",
-        order_by="opentalk_code, nickname"
+        order_by="opentalk_code, nickname",
+        shard_by="opentalk_code"
     ),
     # 예시:
     # SnapshotJob(
@@ -93,18 +194,91 @@ JOBS: list[SnapshotJob] = [
 # 유틸 함수
 # -----------------------------
 
-# --- [추가] 정보스키마에서 컬럼 목록 조회 ---
-def _get_table_columns(schema: str, table: str) -> set[str]:
+# --- [추가] 정보스키마에서 컬럼 목록 조회(JOBS 전체 1회 + 디스크 캐시) ---
+_schema_lock = threading.Lock()
+_schema_cache: dict | None = None  # 이번 실행에서 확정된 캐시(잡 병렬 실행 간 공유)
+
+def _in_params(names: list[str]) -> tuple[str, dict]:
+    """IN (...) 자리표시자와 파라미터 생성"""
+    params = {f"t{i}": n for i, n in enumerate(names)}
+    return ", ".join(f"%({k})s" for k in params), params
+
+def _fetch_create_times(schema: str, tables: list[str]) -> dict[str, str | None]:
+    """테이블별 CREATE_TIME(ALTER 등 DDL 시 갱신, 뷰는 None) — 컬럼 재조회 필요 여부 판단용"""
+    ph, params = _in_params(tables)
+    rows = fetch_all(f"""
+    SELECT TABLE_NAME, CREATE_TIME
+    FROM information_schema.tables
+    WHERE table_schema=%(schema)s AND table_name IN ({ph})
+    """, {"schema": schema, **params})
+    stamps = {t: None for t in tables}
+    stamps.update({r["TABLE_NAME"]: None if r["CREATE_TIME"] is None else str(r["CREATE_TIME"]) for r in rows})
+    return stamps
+
+def _fetch_schema(schema: str, tables: list[str]) -> dict:
+    """tables의 컬럼/CREATE_TIME을 한 번의 쿼리로 조회해 캐시 형식으로 반환"""
+    ph, params = _in_params(tables)
+    rows = fetch_all(f"""
+    SELECT c.TABLE_NAME, c.COLUMN_NAME, t.CREATE_TIME
+    FROM information_schema.columns c
+    JOIN information_schema.tables t ON t.table_schema=c.table_schema AND t.table_name=c.table_name
+    WHERE c.table_schema=%(schema)s AND c.table_name IN ({ph})
+    """, {"schema": schema, **params})
+    out = {t: {"created": None, "columns": []} for t in tables}
+    for r in rows:
+        entry = out[r["TABLE_NAME"]]
+        entry["columns"].append(r["COLUMN_NAME"])
+        entry["created"] = None if r["CREATE_TIME"] is None else str(r["CREATE_TIME"])
+    return {"schema": schema, "checked_at": time.time(), "tables": out}
+
+def _save_schema_cache(cache: dict):
+    tmp_path = SCHEMA_CACHE_PATH + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(serializer.dumps(cache))
+    os.replace(tmp_path, SCHEMA_CACHE_PATH)
+
+def _read_schema_cache(schema: str, tables: list[str]) -> dict | None:
+    """
+    디스크 캐시를 읽어 쓸 수 있으면 반환(없거나 tables를 다 담고 있지 않으면 None)
+    - TTL 안: 그대로 사용(DB 조회 없음)
+    - TTL 지남: CREATE_TIME만 조회해 같으면 확인 시각만 갱신, 다르면 None(컬럼 재조회)
     """
-    information_schema.columns에서 주어진 스키마/테이블의 실제 컬럼명을 집합으로 반환
+    try:
+        cache = serializer.load_file(SCHEMA_CACHE_PATH)
+    except (FileNotFoundError, serializer.JSONDecodeError):
+        return None
+    if not isinstance(cache, dict) or cache.get("schema") != schema or not set(tables) <= set(cache.get("tables") or {}):
+        return None
+    if time.time() - float(cache.get("checked_at") or 0) < SCHEMA_CACHE_TTL:
+        return cache
+    if _fetch_create_times(schema, tables) != {t: cache["tables"][t]["created"] for t in tables}:
+        return None
+    cache["checked_at"] = time.time()
+    _save_schema_cache(cache)
+    return cache
+
+def _load_schema_cache(schema: str, tables: list[str], refresh: bool = False) -> dict:
+    """이번 실행의 스키마 캐시 확보(실행당 0~1회 왕복, refresh=True면 무조건 재조회)"""
+    global _schema_cache
+    cache = None if refresh else _schema_cache
+    if cache is not None and set(tables) <= set(cache["tables"]):
+        return cache
+    cache = None if refresh else _read_schema_cache(schema, tables)
+    if cache is None:
+        cache = _fetch_schema(schema, tables)
+        _save_schema_cache(cache)
+    _schema_cache = cache
+    return cache
+
+def _get_table_columns(schema: str, table: str, refresh: bool = False) -> set[str]:
     """
-    sql = """
-    SELECT COLUMN_NAME
-    FROM information_schema.columns
-    WHERE table_schema=%(schema)s AND table_name=%(table)s
+    주어진 스키마/테이블의 실제 컬럼명을 집합으로 반환
+    - JOBS의 모든 from_ 테이블을 한 번에 조회해 캐시(SCHEMA_CACHE_PATH, SCHEMA_CACHE_TTL)
     """
-    rows = fetch_all(sql, {"schema": schema, "table": table})
-    return {r["COLUMN_NAME"] for r in rows}
+    tables = sorted({j.from_ for j in JOBS} | {table})
+    with _schema_lock:
+        cache = _load_schema_cache(schema, tables, refresh=refresh)
+    return set(cache["tables"][table]["columns"])
 
 # --- [추가] select 문자열에서 원본 컬럼명만 추출(단순 파서) ---
 def _parse_select_columns(select_expr: str) -> list[str]:
@@ -133,6 +307,10 @@ def _make_safe_select(job: SnapshotJob) -> str:
     table_cols = _get_table_columns(os.getenv("DB_NAME"), job.from_)
     requested = _parse_select_columns(job.select)
     missing = [c for c in requested if c not in table_cols]
+    if missing:
+        # 캐시 이후 컬럼이 추가됐을 수 있으므로 한 번 새로 조회해 재확인
+        table_cols = _get_table_columns(os.getenv("DB_NAME"), job.from_, refresh=True)
+        missing = [c for c in requested if c not in table_cols]
     if missing:
         raise RuntimeError(f"[ERROR] Missing columns in {job.from_}: {', '.join(missing)}")
     return job.select
@@ -150,19 +328,26 @@ def _require_env(keys: list[str]):
     if missing:
         raise RuntimeError(f"Missing required environment variables: {', '.join(missing)}")
 
-def _build_sql(job: SnapshotJob) -> str:
+def _build_sql(job: SnapshotJob, extra_where: str | None = None, limit: int | None = None) -> str:
     """
     SnapshotJob → 실제 실행할 SELECT SQL 생성
     - select 컬럼 존재 여부 사전검증(없으면 예외)
+    - extra_where: job.where에 AND로 덧붙일 조건(증분 조회 등)
+    - limit: job.limit 대신 쓸 LIMIT(청크 조회)
     """
-    safe_select = _make_safe_select(job)
+    with _stage("schema"):
+        safe_select = _make_safe_select(job)
     sql = f"SELECT {safe_select} FROM {job.from_}"
-    if job.where:
-        sql += f" WHERE {job.where}"
+    conds = [c for c in (job.where, extra_where) if c]
+    if len(conds) == 1:
+        sql += f" WHERE {conds[0]}"
+    elif conds:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in conds)
     if job.order_by:
         sql += f" ORDER BY {job.order_by}"
-    if job.limit:
-        sql += f" LIMIT {int(job.limit)}"
+    limit = limit or job.limit
+    if limit:
+        sql += f" LIMIT {int(limit)}"
     return sql
 
 
@@ -190,8 +375,64 @@ DB_CONFIG = {
     "raise_on_warnings": False,
 }
 
-# 커넥션 풀 구성
-POOL = pooling.MySQLConnectionPool(pool_name="main_pool", pool_size=5, **DB_CONFIG)
+# 커넥션 풀 구성(병렬 잡 실행 수도 이 크기를 따름)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL = pooling.MySQLConnectionPool(pool_name="main_pool", pool_size=POOL_SIZE, **DB_CONFIG)
+
+# -----------------------------
+# 단계별 계측(실행 리포트용)
+# -----------------------------
+
+# 잡은 스레드 하나에서 끝까지 실행되므로 스레드 로컬에 현재 잡의 단계 기록을 둠(잡 밖에서는 no-op)
+_tls = threading.local()
+
+@contextmanager
+def _stage(name: str, group: bool = False):
+    """
+    name 단계의 소요 시간을 현재 잡 리포트에 누적(중첩 시 자식 시간은 빼고 기록 = 배타 시간)
+    - group=True: 안쪽 단계 이름에 "name." 접두사(예: shards.serialize)
+    - EXPORT_PROFILE: 단계별 tracemalloc 피크(시작 시점 대비 증가분)도 기록
+    """
+    stages = getattr(_tls, "stages", None)
+    if stages is None:
+        yield
+        return
+    stack = _tls.stack
+    key = _tls.prefix + name
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        cur, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+    frame = {"t0": time.perf_counter(), "child": 0.0, "mem0": cur if tracing else 0, "peak": 0}
+    stack.append(frame)
+    prefix = _tls.prefix
+    if group:
+        _tls.prefix = key + "."
+    try:
+        yield
+    finally:
+        _tls.prefix = prefix
+        stack.pop()
+        total = time.perf_counter() - frame["t0"]
+        if stack:
+            stack[-1]["child"] += total
+        st = stages.setdefault(key, {"seconds": 0.0, "calls": 0, "bytes": 0})
+        st["seconds"] += total - frame["child"]
+        st["calls"] += 1
+        if tracing:
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            st["peak_alloc_bytes"] = max(st.get("peak_alloc_bytes", 0), peak - frame["mem0"])
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+
+def _stage_bytes(name: str, n: int):
+    """현재 잡 리포트의 name 단계에 처리 바이트 수 누적"""
+    stages = getattr(_tls, "stages", None)
+    if stages is not None:
+        st = stages.setdefault(_tls.prefix + name, {"seconds": 0.0, "calls": 0, "bytes": 0})
+        st["bytes"] += n
 
 # -----------------------------
 # DB I/O
@@ -209,8 +450,10 @@ def fetch_all(query: str, params: dict | None = None, retries: int = 2, delay: f
         try:
             conn = POOL.get_connection()
             cur = conn.cursor(dictionary=True)
-            cur.execute(query, params or {})
-            return cur.fetchall()
+            with _stage("query"):
+                cur.execute(query, params or {})
+            with _stage("fetch"):
+                return cur.fetchall()
         except Error as e:
             # 마지막 시도면 예외 전파
             if attempt >= retries:
@@ -225,50 +468,946 @@ def fetch_all(query: str, params: dict | None = None, retries: int = 2, delay: f
             except:
                 pass
 
-def export_to_json(query: str, out_path: str, params: dict | None = None):
+def iter_rows(query: str, params: dict | None = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    쿼리 결과를 한 행씩 흘려보내는 제너레이터.
+    - unbuffered 커서 + fetchmany(batch_size)로 서버에서 조금씩 읽어옴
+    - 전체 결과를 메모리에 올리지 않으므로 대용량 테이블에서도 메모리 사용량이 일정
+    주의: 제너레이터를 끝까지 소비해야 커넥션이 깨끗하게 풀로 반환됨
+    """
+    conn = cur = None
+    try:
+        conn = POOL.get_connection()
+        cur = conn.cursor(dictionary=True, buffered=False)
+        with _stage("query"):
+            cur.execute(query, params or {})
+        while True:
+            # yield는 단계 밖에서(소비하는 쪽 시간이 fetch로 잡히지 않도록)
+            with _stage("fetch"):
+                batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        try:
+            if cur: cur.close()
+            if conn: conn.close()
+        except:
+            pass
+
+def _keyset_columns(job: SnapshotJob) -> list[str]:
+    """청크 조회용 keyset 컬럼(= order_by 컬럼) 검증 후 반환"""
+    if not job.order_by:
+        raise RuntimeError(f"[ERROR] SnapshotJob {job.name}: chunk_size requires order_by")
+    if re.search(r"\bDESC\b", job.order_by, re.IGNORECASE):
+        raise RuntimeError(f"[ERROR] SnapshotJob {job.name}: chunk_size supports ascending order_by only")
+    cols = _parse_select_columns(job.order_by)
+    if job.select.strip() != "*":
+        missing = [c for c in cols if c not in _parse_select_columns(job.select)]
+        if missing:
+            raise RuntimeError(f"[ERROR] SnapshotJob {job.name}: order_by columns not in select: {', '.join(missing)}")
+    return cols
+
+def iter_keyset_rows(job: SnapshotJob, retries: int = 2, delay: float = 1.5):
+    """
+    job을 order_by keyset 페이지네이션으로 chunk_size행씩 조회해 한 행씩 흘려보내는 제너레이터.
+    - 첫 청크: ... ORDER BY k LIMIT n / 이후: ... WHERE (k1, k2, ...) > (직전 청크 마지막 키) ORDER BY k LIMIT n
+      → 쿼리마다 인덱스 범위 스캔 n행으로 끝나 장시간 쿼리가 생기지 않음
+    - 청크마다 fetch_all(재시도 포함): 실패해도 해당 청크만 다시 조회(처음부터 다시 쓰지 않음)
+    - job.limit은 전체 행 수 상한으로 적용
+    """
+    key_cols = _keyset_columns(job)
+    size = int(job.chunk_size)
+    cond = "({}) > ({})".format(", ".join(key_cols), ", ".join(f"%(k{i})s" for i in range(len(key_cols))))
+    first_sql = _build_sql(job, limit=size)
+    next_sql = _build_sql(job, extra_where=cond, limit=size)
+    remaining = job.limit
+    last = None
+    while True:
+        if last is None:
+            rows = fetch_all(first_sql, None, retries, delay)
+        else:
+            rows = fetch_all(next_sql, {f"k{i}": v for i, v in enumerate(last)}, retries, delay)
+        if remaining is not None:
+            rows = rows[:remaining]
+            remaining -= len(rows)
+        if not rows:
+            return
+        key = tuple(rows[-1][c] for c in key_cols)
+        # NULL이 섞이면 행 비교가 NULL이 되어 다음 청크가 비어버림 → 조용히 잘리지 않도록 중단
+        if any(v is None for v in key):
+            raise RuntimeError(f"[ERROR] SnapshotJob {job.name}: NULL in keyset columns {key_cols}")
+        yield from rows
+        if len(rows) < size or remaining == 0:
+            return
+        last = key
+
+class _ChecksumWriter:
+    """쓰는 바이트 전체의 sha256을 함께 계산하는 파일 래퍼(교체 전 무결성 확인용)"""
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def write(self, data: bytes):
+        self.digest.update(data)
+        self.f.write(data)
+
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+class _RowsSink:
     """
-    쿼리 실행 결과를 JSON으로 저장(원자적 교체).
+    행 형식 스냅샷을 한 행씩 기록하는 push 방식 writer(샤드처럼 다른 스트림 도중에 나눠 쓸 때 사용)
+    row_count/rows_sha256은 끝까지 받아야 알 수 있으므로 rows 뒤(close)에 기록한다.
+    - rows_sha256: 직렬화된 rows 배열 바이트의 sha256(generated_at 등 메타데이터는 제외)
+    - 파일 해시: 기록한 전체 바이트의 sha256(_verify_tmp에서 디스크 내용과 비교)
+    """
+    def __init__(self, path: str, source: dict):
+        head = {
+            "generated_at": _now_iso(),
+            "source": source,
+        }
+        self.n = 0
+        self._digest = hashlib.sha256()
+        self._raw = open(path, "wb")
+        self._f = _ChecksumWriter(self._raw)
+        # '{"generated_at": ..., "source": {...}' 까지 쓰고 rows 배열을 열어둠
+        self._f.write(serializer.dumps(head)[:-1] + b',"rows":[')
+
+    def write(self, row: dict):
+        chunk = serializer.dumps(row)
+        if self.n:
+            chunk = b"," + chunk
+        self._digest.update(chunk)
+        self._f.write(chunk)
+        self.n += 1
+
+    def close(self) -> tuple[int, str, str]:
+        rows_hash = self._digest.hexdigest()
+        self._f.write(_footer(self.n, rows_hash, b"]"))
+        self._raw.close()
+        return self.n, rows_hash, self._f.hexdigest()
+
+    def abort(self):
+        self._raw.close()
+
+class _ColumnarSink:
+    """
+    컬럼형 스냅샷을 한 행씩 기록하는 push 방식 writer
+    - 컬럼 값(사전 컬럼은 코드)을 BATCH행마다 직렬화해 컬럼별 임시 spool 파일에 이어 쓰고,
+      close()에서 head + columns + footer로 이어 붙임 → 메모리는 사전 값 목록 + 배치만큼(행 수와 무관)
+    - columns 바이트는 serializer.dumps(columnar.encode(rows, dict_columns)[1])와 같음 → rows_sha256 호환
+    """
+    BATCH = 8192
+
+    def __init__(self, path: str, source: dict, dict_columns: list[str]):
+        self.path, self.source, self.dict_columns = path, source, set(dict_columns)
+        self.names: list[str] | None = None
+        self.n = 0
+        self._buf: dict[str, list] = {}
+        self._lookup: dict[str, dict] = {}
+        self._spool: dict = {}  # 컬럼 → 임시 파일(첫 flush 때 생성, 작은 스냅샷/샤드는 만들지 않음)
+
+    def write(self, row: dict):
+        if self.names is None:
+            self.names = list(row.keys())
+            for c in self.names:
+                self._buf[c] = []
+                if c in self.dict_columns:
+                    self._lookup[c] = {}
+        for c in self.names:
+            v = row.get(c)
+            d = self._lookup.get(c)
+            if d is not None:
+                code = d.get(v)
+                if code is None:
+                    code = d[v] = len(d)
+                v = code
+            self._buf[c].append(v)
+        self.n += 1
+        if self.n % self.BATCH == 0:
+            self._flush()
+
+    def _flush(self):
+        for c, buf in self._buf.items():
+            spool = self._spool.get(c)
+            if spool is None:
+                spool = self._spool[c] = tempfile.TemporaryFile(dir=os.path.dirname(self.path) or ".")
+            else:
+                spool.write(b",")
+            spool.write(serializer.dumps(buf)[1:-1])
+            buf.clear()
+
+    def close(self) -> tuple[int, str, str]:
+        head = {
+            "generated_at": _now_iso(),
+            "source": self.source,
+            "format": columnar.FORMAT,
+        }
+        digest = hashlib.sha256()
+        try:
+            with open(self.path, "wb") as raw:
+                f = _ChecksumWriter(raw)
+                f.write(serializer.dumps(head)[:-1] + b',"columns":')
+
+                def body(chunk: bytes):
+                    digest.update(chunk)
+                    f.write(chunk)
+
+                body(b"{")
+                for i, c in enumerate(self.names or ()):
+                    body((b"," if i else b"") + serializer.dumps(c) + b":")
+                    lookup = self._lookup.get(c)
+                    body(b'{"dict":' + serializer.dumps(list(lookup)) + b',"codes":[' if lookup is not None else b"[")
+                    spool = self._spool.get(c)
+                    if spool is not None:
+                        spool.seek(0)
+                        for chunk in iter(lambda: spool.read(1 << 20), b""):
+                            body(chunk)
+                    rest = serializer.dumps(self._buf[c])[1:-1]
+                    if rest:
+                        body((b"," if spool is not None else b"") + rest)
+                    body(b"]}" if lookup is not None else b"]")
+                body(b"}")
+                rows_hash = digest.hexdigest()
+                f.write(_footer(self.n, rows_hash))
+        finally:
+            self.abort()
+        return self.n, rows_hash, f.hexdigest()
+
+    def abort(self):
+        for spool in self._spool.values():
+            spool.close()
+        self._spool.clear()
+
+def _drain(sink, rows) -> tuple[int, str, str]:
+    """rows(이터러블)를 sink에 모두 기록하고 (행 수, rows 해시, 파일 해시) 반환(실패 시 sink 정리)"""
+    try:
+        for row in rows:
+            sink.write(row)
+    except BaseException:
+        sink.abort()
+        raise
+    return sink.close()
+
+def _write_snapshot_stream(path: str, rows, source: dict) -> tuple[int, str, str]:
+    """rows(이터러블)를 행 형식 스냅샷으로 path에 점진적으로 기록하고 (행 수, rows 해시, 파일 해시)를 반환"""
+    return _drain(_RowsSink(path, source), rows)
+
+def _write_columnar(path: str, rows, source: dict, dict_columns: list[str]) -> tuple[int, str, str]:
+    """
+    rows(이터러블)를 컬럼형 스냅샷으로 path에 기록하고 (행 수, 내용 해시, 파일 해시)를 반환.
+    - rows_sha256: 직렬화된 columns 바이트의 sha256 → 행 형식과 같은 방식으로 변경 감지
+    """
+    return _drain(_ColumnarSink(path, source, dict_columns), rows)
+
+def _footer(n: int, rows_hash: str, prefix: bytes = b"") -> bytes:
+    """스냅샷 꼬리(행 수 + rows 해시로 끝남) — 기록과 검증이 같은 bytes를 쓰도록 한 곳에서 생성"""
+    return prefix + f',"row_count":{n},"rows_sha256":"{rows_hash}"}}'.encode("utf-8")
+
+def _verify_tmp(path: str, row_count: int, rows_hash: str, file_hash: str):
+    """
+    전체 역직렬화 없이 .tmp 무결성 확인(실패 시 RuntimeError → 교체하지 않음)
+    - 디스크에서 다시 읽은 bytes의 sha256 == 기록 중 계산한 파일 해시(잘림/손상 감지, 1MB씩 읽어 메모리 일정)
+    - 구조: '{"generated_at"'로 시작하고 기록한 행 수/rows 해시 꼬리로 끝나야 함
+    """
+    digest = hashlib.sha256()
+    head = tail = b""
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            if not head:
+                head = chunk[:16]
+            digest.update(chunk)
+            tail = (tail + chunk)[-512:]
+    if digest.hexdigest() != file_hash:
+        raise RuntimeError(f"[ERROR] checksum mismatch (truncated/corrupt): {path}")
+    if not head.startswith(b'{"generated_at"') or not tail.endswith(_footer(row_count, rows_hash)):
+        raise RuntimeError(f"[ERROR] unexpected snapshot structure: {path}")
+
+def _sink_for(job: SnapshotJob):
+    """job.format에 맞는 push 방식 writer 생성 함수((path, source) → sink) 반환"""
+    if job.format == columnar.FORMAT:
+        dict_cols = _parse_select_columns(job.dict_columns or "")
+        return lambda path, source: _ColumnarSink(path, source, dict_cols)
+    if job.format != "rows":
+        raise RuntimeError(f"[ERROR] SnapshotJob {job.name}: unknown format {job.format!r}")
+    return _RowsSink
+
+def _writer_for(job: SnapshotJob):
+    """job.format에 맞는 스냅샷 기록 함수((path, rows, source) → (행 수, rows 해시, 파일 해시)) 반환"""
+    sink = _sink_for(job)
+    return lambda path, rows, source: _drain(sink(path, source), rows)
+
+# 스냅샷 꼬리에서 rows_sha256만 읽기 위한 패턴(전체 파싱 없이 비교)
+_ROWS_HASH_RE = re.compile(rb'"rows_sha256":\s*"([0-9a-f]{64})"')
+
+def _read_rows_hash(path: str) -> str | None:
+    """
+    기존 스냅샷 파일 끝부분에서 rows_sha256 값을 읽어 반환(없거나 파일이 없으면 None)
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 512))
+            m = _ROWS_HASH_RE.search(f.read())
+    except FileNotFoundError:
+        return None
+    return m.group(1).decode("ascii") if m else None
+
+def export_to_json(query: str, out_path: str, params: dict | None = None,
+                   retries: int = 2, delay: float = 1.5, batch_size: int = EXPORT_BATCH_SIZE,
+                   writer=_write_snapshot_stream, shards: "_ShardStream | None" = None):
+    """
+    쿼리 실행 결과를 JSON으로 스트리밍 저장(원자적 교체).
     - out_path: 저장 경로(data/{name}.json)
+    - batch_size: fetchmany 배치 크기
+    - writer: 스냅샷 기록 함수(기본: 행 형식, 컬럼형은 _writer_for(job))
+    - shards: 주어지면 같은 행 스트림으로 샤드 .tmp도 함께 기록(_ShardStream)
+    - DB 오류 시 .tmp를 처음부터 다시 쓰며 재시도(retries회, fetch_all과 동일한 백오프)
+    - 반환: 파일이 갱신됐으면 True, rows 내용이 기존과 같아 그대로 뒀으면 False
     JSON 구조:
     {
       "generated_at": "...",
-      "row_count": N,
       "source": {"type": "sql", "query": "..."},
-      "rows": [...]
+      "rows": [...],
+      "row_count": N,
+      "rows_sha256": "..."
     }
     """
-    rows = fetch_all(query, params)
-    snapshot = {
-        "generated_at": _now_iso(),
-        "row_count": len(rows),
-        "source": {"type": "sql", "query": query.strip()},
-        "rows": rows,
-    }
-
     p = Path(out_path)
     p.parent.mkdir(parents=True, exist_ok=True)
 
     tmp_path = str(p) + ".tmp"
 
     # 임시파일에 먼저 기록(부분쓰기/프로세스 중단 등으로 인한 깨짐 방지)
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(snapshot, f, ensure_ascii=False, default=str)
+    for attempt in range(retries + 1):
+        try:
+            rows = iter_rows(query, params, batch_size)
+            with _stage("serialize"):
+                row_count, rows_hash, file_hash = writer(
+                    tmp_path, shards.tee(rows) if shards else rows,
+                    {"type": "sql", "query": query.strip()},
+                )
+            _stage_bytes("serialize", os.path.getsize(tmp_path))
+            break
+        except Error:
+            if attempt >= retries:
+                raise
+            time.sleep(delay * (attempt + 1))
+
+    return _commit_tmp(tmp_path, out_path, row_count, rows_hash, file_hash, compress=True)
+
+def export_chunked(job: SnapshotJob, out_path: str, retries: int = 2, delay: float = 1.5,
+                   shards: "_ShardStream | None" = None) -> bool:
+    """
+    export_to_json의 청크 조회 버전(job.chunk_size): iter_keyset_rows 결과를 그대로 writer에 스트리밍.
+    - 재시도는 청크 단위(iter_keyset_rows)이므로 여기서는 다시 쓰지 않음
+    - 반환: 파일 갱신 여부(export_to_json과 동일)
+    """
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    source = {"type": "sql", "query": _build_sql(job).strip(), "mode": "keyset", "chunk_size": int(job.chunk_size)}
+    rows = iter_keyset_rows(job, retries, delay)
+    with _stage("serialize"):
+        row_count, rows_hash, file_hash = _writer_for(job)(tmp_path, shards.tee(rows) if shards else rows, source)
+    _stage_bytes("serialize", os.path.getsize(tmp_path))
+    return _commit_tmp(tmp_path, out_path, row_count, rows_hash, file_hash, compress=True)
+
+def compressed_siblings(out_path: str) -> list[str]:
+    """설정상 out_path와 함께 만들어지는 사전압축본 경로 목록(.gz/.br)"""
+    return ([out_path + ".gz"] if EXPORT_GZIP else []) + ([out_path + ".br"] if EXPORT_BROTLI else [])
+
+def sibling_paths(out_path: str) -> list[str]:
+    """설정과 무관하게 out_path 옆에 있을 수 있는 사전압축본 + sidecar 경로 전체(정리/커밋 대상 판단용)"""
+    return [out_path + ".gz", out_path + ".br", out_path + COMPRESSED_SOURCE_EXT]
+
+def _remove_stale_siblings(out_path: str, keep: list[str]):
+    """keep에 없는 사전압축본/sidecar 삭제(압축을 끈 뒤 옛 압축본이 원본 대신 전송되지 않도록)"""
+    for p in sibling_paths(out_path):
+        if p not in keep and os.path.exists(p):
+            os.remove(p)
 
-    # JSON 검증(역직렬화에 실패하면 교체하지 않음)
-    with open(tmp_path, encoding="utf-8") as f:
-        json.load(f)
+def _write_compressed(src_path: str, out_path: str) -> list[tuple[str, str]]:
+    """
+    src_path 내용을 압축해 out_path의 사전압축본(.tmp)을 만들고 [(tmp, 최종경로)...] 반환.
+    - gzip은 mtime=0으로 고정해 같은 입력이면 같은 bytes(불필요한 diff 방지)
+    - 압축본이 있으면 sidecar(.src: 원본 size + rows_sha256)도 함께 만듦(목록 마지막)
+    """
+    pairs = []
+    for dst in compressed_siblings(out_path):
+        tmp = dst + ".tmp"
+        with open(src_path, "rb") as src, open(tmp, "wb") as raw:
+            if dst.endswith(".gz"):
+                with gzip.GzipFile(filename="", mode="wb", compresslevel=9, fileobj=raw, mtime=0) as gz:
+                    shutil.copyfileobj(src, gz, 1 << 20)
+            else:
+                comp = brotli.Compressor(quality=11)
+                while chunk := src.read(1 << 20):
+                    raw.write(comp.process(chunk))
+                raw.write(comp.finish())
+        pairs.append((tmp, dst))
+    if pairs:
+        dst = out_path + COMPRESSED_SOURCE_EXT
+        with open(dst + ".tmp", "wb") as f:
+            f.write(serializer.dumps({"size": os.path.getsize(src_path), "rows_sha256": _read_rows_hash(src_path)}))
+        pairs.append((dst + ".tmp", dst))
+    return pairs
 
-    # 원자적 교체
+def _commit_tmp(tmp_path: str, out_path: str, row_count: int, rows_hash: str, file_hash: str,
+                echo: bool = True, compress: bool = False) -> bool:
+    """
+    .tmp 파일을 검증(_verify_tmp: 파일 해시 + 구조)한 뒤 최종 경로로 원자적 교체하고 갱신 여부를 반환.
+    - 기존 파일의 rows_sha256이 같으면 .tmp를 버리고 기존 파일을 바이트 그대로 유지(False)
+      (사전압축본이 없으면 기존 파일로 만들어 둠)
+    - echo=False: 결과 출력 생략(샤드처럼 파일 수가 많은 경우)
+    - compress=True: .gz/.br 사전압축본(+ sidecar)도 만들어 본 파일과 함께 교체
+    - 설정상 만들지 않는 사전압축본/sidecar가 남아 있으면 삭제(compress=False면 전부)
+    """
+    keep = compressed_siblings(out_path) if compress else []
+    if keep:
+        keep.append(out_path + COMPRESSED_SOURCE_EXT)
+    if _read_rows_hash(out_path) == rows_hash:
+        os.remove(tmp_path)
+        if not all(os.path.exists(p) for p in keep):
+            for tmp, dst in _write_compressed(out_path, out_path):
+                os.replace(tmp, dst)
+        _remove_stale_siblings(out_path, keep)
+        if echo:
+            print(f"[SKIP] {row_count} rows unchanged → {out_path}")
+        return False
+
+    # 무결성 검증(잘리거나 손상됐으면 교체하지 않음) — 전체 JSON 재파싱 대신 해시 + 머리/꼬리 확인
+    with _stage("validate"):
+        _verify_tmp(tmp_path, row_count, rows_hash, file_hash)
+    _stage_bytes("validate", os.path.getsize(tmp_path))
+
+    # 압축본을 모두 만든 뒤 한꺼번에 교체(본 파일은 마지막에 → 본 파일이 보이면 압축본도 최신)
+    pairs = []
+    if compress:
+        with _stage("compress"):
+            pairs = _write_compressed(tmp_path, out_path)
+        _stage_bytes("compress", sum(os.path.getsize(tmp) for tmp, _ in pairs))
+    for tmp, dst in pairs:
+        os.replace(tmp, dst)
+    _remove_stale_siblings(out_path, keep)
     os.replace(tmp_path, out_path)
-    print(f"[OK] {snapshot['row_count']} rows → {out_path}")
+    if echo:
+        print(f"[OK] {row_count} rows → {out_path}")
+    return True
+
+def _load_snapshot_rows(path: str) -> list[dict] | None:
+    """
+    기존 스냅샷 파일의 rows를 반환(컬럼형이면 행으로 복원). 파일이 없거나 형식이 깨졌으면 None
+    """
+    try:
+        data = serializer.load_file(path)
+    except (FileNotFoundError, serializer.JSONDecodeError):
+        return None
+    if columnar.is_columnar(data):
+        return columnar.to_rows(data)
+    rows = data.get("rows") if isinstance(data, dict) else None
+    return rows if isinstance(rows, list) else None
+
+def _incremental_fits(path: str) -> bool:
+    """기존 스냅샷이 증분 병합으로 메모리에 올려도 되는 크기인지(EXPORT_INCREMENTAL_MAX_MB 이하, 없으면 True)"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return True
+    if size <= EXPORT_INCREMENTAL_MAX_MB * 1e6:
+        return True
+    print(f"[INFO] {path} {size / 1e6:.1f}MB > EXPORT_INCREMENTAL_MAX_MB={EXPORT_INCREMENTAL_MAX_MB:g} → full export")
+    return False
 
-def export_job(job: SnapshotJob) -> str:
+def _merge_in_order(prev_rows: list[dict], delta: list[dict], key_of) -> list[dict]:
     """
-    JOB 한 건을 실행하여 data/{name}.json 생성 후 최종 경로 반환
+    prev_rows(기존 파일 순서)를 그대로 두고 delta(SQL ORDER BY 순서)를 병합
+    - 이미 있는 키: 제자리 교체
+    - 새 키: delta에서 바로 앞/뒤에 오는 기존 키 사이에 삽입. 그 사이에 있는 (delta에 없는) 기존 행들과의
+      상대 위치만 파이썬 값 비교로 정함(대소문자 무시 = _ci 콜레이션 근사, 정확한 콜레이션은 알 수 없으므로 비교 범위를 최소화)
+    """
+    def py_key(k: tuple) -> tuple:
+        return tuple("" if v is None else str(v).upper() for v in k)
+
+    pos = {key_of(r): i for i, r in enumerate(prev_rows)}
+    out = list(prev_rows)
+    inserts: dict[int, list[dict]] = {}  # 기존 행 위치 i 앞에 넣을 새 행들(len(prev_rows) = 맨 뒤)
+
+    def place(new_rows: list[dict], lo: int, hi: int):
+        keys = [py_key(key_of(r)) for r in prev_rows[lo:hi]]
+        at = lo
+        for r in new_rows:
+            # delta 순서(SQL 순서)를 거스르지 않도록 삽입 위치는 단조 증가
+            at = max(at, lo + bisect_right(keys, py_key(key_of(r))))
+            inserts.setdefault(at, []).append(r)
+
+    pending: list[dict] = []
+    lo = 0
+    for r in delta:
+        i = pos.get(key_of(r))
+        if i is None:
+            pending.append(r)
+            continue
+        out[i] = r
+        if pending:
+            place(pending, min(lo, i), i)
+            pending = []
+        lo = i + 1
+    if pending:
+        place(pending, min(lo, len(prev_rows)), len(prev_rows))
+    if not inserts:
+        return out
+
+    merged = []
+    for i, r in enumerate(out):
+        merged += inserts.get(i, ())
+        merged.append(r)
+    merged += inserts.get(len(out), ())
+    return merged
+
+def export_incremental(job: SnapshotJob, out_path: str, prev_rows: list[dict],
+                       shards: "_ShardStream | None" = None) -> bool | None:
+    """
+    증분 export: 기존 스냅샷의 watermark 최댓값(- lookback_days) 이후 행만 조회해
+    job.key 기준으로 병합(같은 키는 새 값으로 교체)하고 원자적으로 다시 씀.
+    - 반환: 파일 갱신 여부(True/False). 기존 스냅샷에 watermark 값이 없으면 None(호출측에서 전체 조회)
+    - 기존 스냅샷을 모두 메모리에 올리므로 작은 스냅샷 전용(export_job이 _incremental_fits로 판단)
+    - 행 순서는 기존 파일(= MySQL ORDER BY 콜레이션 순서)을 유지하고 새 행만 끼워 넣음(_merge_in_order)
+      → 전체 조회/청크 조회 결과와 순서가 같아 내용이 그대로면 rows_sha256도 그대로
+    """
+    if not job.key:
+        raise RuntimeError(f"[ERROR] SnapshotJob {job.name}: watermark requires key")
+    key_cols = _parse_select_columns(job.key)
+    wm = max((r[job.watermark] for r in prev_rows if r.get(job.watermark) is not None), default=None)
+    if wm is None:
+        return None
+
+    cond = f"{job.watermark} >= %(wm)s - INTERVAL {int(job.lookback_days)} DAY"
+    query = _build_sql(job, extra_where=cond)
+    delta = fetch_all(query, {"wm": str(wm)})
+
+    def key_of(r: dict) -> tuple:
+        return tuple(r.get(c) for c in key_cols)
+
+    with _stage("merge"):
+        # 파일에서 읽은 행과 같은 표현(날짜/Decimal → 문자열)으로 맞춘 뒤 병합
+        delta = [serializer.loads(serializer.dumps(r)) for r in delta]
+        rows = _merge_in_order(prev_rows, delta, key_of)
+
+    tmp_path = out_path + ".tmp"
+    source = {"type": "sql", "query": query.strip(), "mode": "incremental", "watermark": str(wm), "delta_rows": len(delta)}
+    with _stage("serialize"):
+        row_count, rows_hash, file_hash = _writer_for(job)(tmp_path, shards.tee(rows) if shards else rows, source)
+    _stage_bytes("serialize", os.path.getsize(tmp_path))
+    return _commit_tmp(tmp_path, out_path, row_count, rows_hash, file_hash, compress=True)
+
+def _shard_file(value: str) -> str:
+    """샤드 값(한글 포함 가능) → URL/파일시스템에 안전한 고정 파일명"""
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:12] + ".json"
+
+class _ShardStream:
+    """
+    export 중인 행 스트림을 그대로 흘려보내며(tee) job.shard_by 값별 샤드 .tmp 파일을 함께 기록
+    - 행은 ORDER BY opentalk_code(= shard_by) 순으로 오므로 값이 바뀔 때마다 이전 샤드를 닫음
+      → 전체 스냅샷을 다시 읽거나 값별 행 목록을 모으지 않음(메모리는 샤드 writer 1개분)
+    - 이미 닫은 값이 다시 나오면(콜레이션 차이 등) ordered=False → write_shards가 파일 기반 분할로 대체
+    - 재시도로 tee를 다시 호출하면 이전 기록은 버리고 처음부터 씀
+    """
+    def __init__(self, job: SnapshotJob):
+        self.job = job
+        self.dir = Path(SNAPSHOT_DIR) / job.name
+        self.parts: dict[str, tuple] = {}  # 값 → (tmp 경로, 행 수, rows 해시, 파일 해시)
+        self.row_count = 0
+        self.ordered = False
+        self._sink = self._value = self._tmp = None
+
+    def tee(self, rows):
+        self.discard()
+        self.ordered = True
+        self.dir.mkdir(parents=True, exist_ok=True)
+        new_sink = _sink_for(self.job)
+        try:
+            for row in rows:
+                self.row_count += 1
+                if self.ordered:
+                    v = row.get(self.job.shard_by)
+                    v = "" if v is None else str(v).strip()
+                    if v != self._value:
+                        self._close()
+                        if v in self.parts:
+                            self.ordered = False
+                        elif v:
+                            self._tmp = str(self.dir / _shard_file(v)) + ".tmp"
+                            source = {"type": "shard", "snapshot": self.job.name, "shard_by": self.job.shard_by, "value": v}
+                            self._sink, self._value = new_sink(self._tmp, source), v
+                    if self._sink is not None:
+                        self._sink.write(row)
+                yield row
+            self._close()
+        except BaseException:
+            self.discard()
+            raise
+
+    def _close(self):
+        if self._sink is not None:
+            sink, self._sink = self._sink, None
+            self.parts[self._value] = (self._tmp, *sink.close())
+        self._value = None
+
+    def discard(self):
+        """기록 중/완료된 샤드 .tmp를 모두 지우고 초기화"""
+        tmps = [tmp for tmp, *_ in self.parts.values()]
+        if self._sink is not None:
+            self._sink.abort()
+            tmps.append(self._tmp)
+        for tmp in tmps:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.parts, self.row_count, self.ordered = {}, 0, False
+        self._sink = self._value = self._tmp = None
+
+def _split_snapshot(job: SnapshotJob, snapshot_path: str, shard_dir: Path) -> tuple[dict, int] | None:
+    """
+    (스트림이 없을 때) 기존 스냅샷 파일을 shard_by 값별 .tmp로 나눠 기록 → ({값: (tmp, n, rows 해시, 파일 해시)}, 전체 행 수)
+    - 값별로는 행 번호만 모으고, 행 dict는 샤드를 쓸 때 그 샤드 분량만 만듦(컬럼형이면 to_rows 없이 컬럼에서 직접)
+    """
+    try:
+        data = serializer.load_file(snapshot_path)
+    except (FileNotFoundError, serializer.JSONDecodeError):
+        return None
+    if columnar.is_columnar(data):
+        cols = data["columns"]
+        n = int(data.get("row_count") or 0)
+        getters = {}
+        for c, col in cols.items():
+            if isinstance(col, dict):
+                getters[c] = lambda i, d=col["dict"], codes=col["codes"]: d[codes[i]]
+            else:
+                getters[c] = col.__getitem__
+        row_at = lambda i: {c: get(i) for c, get in getters.items()}
+        key_dict, key_codes = columnar.dict_column(data, job.shard_by)
+        key_at = lambda i: key_dict[key_codes[i]]
+    else:
+        rows = data.get("rows") if isinstance(data, dict) else None
+        if not isinstance(rows, list):
+            return None
+        n = len(rows)
+        row_at = rows.__getitem__
+        key_at = lambda i: rows[i].get(job.shard_by)
+
+    groups: dict[str, array] = {}
+    for i in range(n):
+        v = key_at(i)
+        if v is None or str(v).strip() == "":
+            continue
+        groups.setdefault(str(v).strip(), array("q")).append(i)
+
+    sink = _sink_for(job)
+    parts = {}
+    for value, idx in groups.items():
+        tmp = str(shard_dir / _shard_file(value)) + ".tmp"
+        source = {"type": "shard", "snapshot": job.name, "shard_by": job.shard_by, "value": value}
+        parts[value] = (tmp, *_drain(sink(tmp, source), (row_at(i) for i in idx)))
+    return parts, n
+
+def write_shards(job: SnapshotJob, snapshot_path: str, force: bool = False,
+                 stream: _ShardStream | None = None) -> list[str]:
+    """
+    스냅샷을 job.shard_by 값별로 나눠 data/{name}/ 아래에 기록하고 바뀐 파일 경로 목록을 반환.
+    - 샤드 파일: 스냅샷과 같은 형식(rows_sha256 포함). 내용이 같으면 파일을 건드리지 않음
+    - manifest.json: {"shards": {값: {"file", "row_count", "rows_sha256"}}} — 샤드 구성이 바뀔 때만 갱신
+    - 더 이상 없는 값의 샤드 파일은 삭제
+    - stream: export 중에 이미 기록한 샤드(_ShardStream) → 그대로 검증/교체(내용이 같은 샤드는 건드리지 않음)
+    - stream이 없거나 순서가 어긋났으면 스냅샷 파일에서 다시 나눔. 단 force=False이고 manifest가 이미 있으면
+      (원본 스냅샷이 그대로면) 아무것도 하지 않음
+    """
+    shard_dir = Path(SNAPSHOT_DIR) / job.name
+    manifest_path = shard_dir / SHARD_MANIFEST
+    if stream is not None and stream.ordered:
+        parts, row_count = stream.parts, stream.row_count
+    else:
+        if stream is not None:
+            stream.discard()
+        if not force and manifest_path.exists():
+            return []
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        with _stage("serialize"):
+            split = _split_snapshot(job, snapshot_path, shard_dir)
+        if split is None:
+            return []
+        parts, row_count = split
+    _stage_bytes("serialize", sum(os.path.getsize(tmp) for tmp, *_ in parts.values()))
+
+    changed: list[str] = []
+    shards = {}
+    for value in sorted(parts):
+        tmp, n, rows_hash, file_hash = parts[value]
+        path = tmp[:-len(".tmp")]
+        if _commit_tmp(tmp, path, n, rows_hash, file_hash, echo=False):
+            changed.append(path)
+        shards[value] = {"file": _shard_file(value), "row_count": n, "rows_sha256": rows_hash}
+
+    # 사라진 값의 샤드 정리
+    keep = {s["file"] for s in shards.values()} | {SHARD_MANIFEST}
+    for p in shard_dir.glob("*.json"):
+        if p.name not in keep:
+            p.unlink()
+            changed.append(str(p))
+
+    try:
+        old_shards = serializer.load_file(str(manifest_path)).get("shards")
+    except (FileNotFoundError, serializer.JSONDecodeError):
+        old_shards = None
+    if old_shards != shards:
+        manifest = {"generated_at": _now_iso(), "snapshot": job.name, "shard_by": job.shard_by,
+                    "row_count": row_count, "shards": shards}
+        tmp_path = str(manifest_path) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(serializer.dumps(manifest))
+        os.replace(tmp_path, manifest_path)
+        changed.append(str(manifest_path))
+    print(f"[OK] {len(shards)} shards ({len(changed)} files changed) → {shard_dir}")
+    return changed
+
+def export_job(job: SnapshotJob) -> tuple[str, list[str]]:
+    """
+    JOB 한 건을 실행하여 data/{name}.json(+샤드/집계 스냅샷) 생성 후 (최종 경로, 내용이 바뀐 파일 목록) 반환
     """
     out_path = f"{SNAPSHOT_DIR}/{job.name}.json"
-    export_to_json(_build_sql(job), out_path=out_path)
-    return out_path
+    changed = None
+    # 샤드는 export 행 스트림에서 바로 기록(스냅샷을 다시 읽어 행 dict로 펼치지 않음)
+    shards = _ShardStream(job) if job.shard_by else None
+    try:
+        # 증분 잡: 기존 스냅샷이 있으면 delta만 조회해 병합(없거나 깨졌으면 전체 조회)
+        if job.watermark and not EXPORT_FULL_REFRESH and _incremental_fits(out_path):
+            with _stage("load_prev"):
+                prev_rows = _load_snapshot_rows(out_path)
+            if prev_rows:
+                changed = export_incremental(job, out_path, prev_rows, shards=shards)
+                del prev_rows
+        if changed is None and job.chunk_size:
+            changed = export_chunked(job, out_path, shards=shards)
+        elif changed is None:
+            changed = export_to_json(_build_sql(job), out_path=out_path, writer=_writer_for(job), shards=shards)
+    except BaseException:
+        if shards is not None:
+            shards.discard()  # 기록하다 만 샤드 .tmp가 샤드 디렉터리에 남지 않도록
+        raise
+
+    # 압축본은 본 파일과 함께 커밋(본 파일이 그대로여도 압축본을 처음 만든 경우 포함)
+    # 내용이 그대로여도 아직 커밋되지 않은 파일(이전 실행의 push 실패 등)은 다시 커밋 대상에 넣음
+    # 삭제된 옛 압축본/sidecar도 커밋 대상(git add가 삭제를 반영)
+    changed_paths = [p for p in [out_path, *sibling_paths(out_path)]
+                     if (changed and os.path.exists(p)) or _has_changes([p])]
+    if job.shard_by:
+        with _stage("shards", group=True):
+            shard_paths = write_shards(job, out_path, force=changed, stream=shards)
+            shard_dir = f"{SNAPSHOT_DIR}/{job.name}"
+            changed_paths += shard_paths or ([shard_dir] if _has_changes([shard_dir]) else [])
+    for agg in AGGREGATE_JOBS:
+        if agg.source == job.name:
+            with _stage(f"aggregate:{agg.name}", group=True):
+                agg_paths = export_aggregate(agg, out_path, force=changed)
+                agg_path = f"{SNAPSHOT_DIR}/{agg.name}.json"
+                changed_paths += agg_paths or ([agg_path] if _has_changes([agg_path]) else [])
+    return out_path, changed_paths
+
+# -----------------------------
+# 집계(파생) 스냅샷
+# -----------------------------
+
+def _to_float(v) -> float | None:
+    try:
+        return float(v) if v not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def _room_code(v) -> str | None:
+    s = str(v).strip() if v is not None else ""
+    return s or None
+
+def progress_room_daily(t: columnar.Table) -> list[dict]:
+    """
+    study_progress → (방, 날짜)별 롤업
+    - users: 그날 기록이 있는 인원, active_users: 직전 기록보다 진도율이 오른 인원
+    - avg_progress / median_progress: 그날 인원 진도율 평균/중앙값
+    - 한 사람이 같은 날 여러 그룹 행을 가지면 최댓값 1개로 셈
+    """
+    code_v, code_c = t.dict_col("opentalk_code")
+    nick_v, nick_c = t.dict_col("nickname")
+    date_v, date_c = t.dict_col("progress_date")
+    prog = t.float_col("progress")
+    best: dict[tuple, float] = {}
+    for i in range(len(t)):
+        p, d = prog[i], date_v[date_c[i]]
+        if p != p or not d or _room_code(code_v[code_c[i]]) is None:
+            continue
+        k = (code_c[i], nick_c[i], str(d)[:10])
+        if best.get(k, -1.0) < p:
+            best[k] = p
+
+    # (방, 닉네임, 날짜) 순으로 훑으며 같은 사람의 직전 값과 비교
+    cells: dict[tuple, list] = {}
+    prev_user = prev = None
+    for (c, n, d), p in sorted(best.items()):
+        cell = cells.setdefault((c, d), [[], 0])
+        cell[0].append(p)
+        if prev_user == (c, n) and p > prev:
+            cell[1] += 1
+        prev_user, prev = (c, n), p
+
+    out = []
+    for (c, d), (vals, active) in cells.items():
+        vals.sort()
+        k = len(vals)
+        median = vals[k // 2] if k % 2 else (vals[k // 2 - 1] + vals[k // 2]) / 2
+        out.append({"opentalk_code": _room_code(code_v[c]), "progress_date": d, "users": k,
+                    "active_users": active, "avg_progress": round(fsum(vals) / k, 2),
+                    "median_progress": round(median, 2)})
+    out.sort(key=lambda r: (r["opentalk_code"], r["progress_date"]))
+    return out
+
+def cert_rank_distribution(t: columnar.Table) -> list[dict]:
+    """study_cert → 방별 user_rank 분포(랭크별 인원, 랭크 없음은 null)"""
+    counts = Counter()
+    for i in range(len(t)):
+        code = _room_code(t.value("opentalk_code", i))
+        if code is not None:
+            counts[(code, t.value("user_rank", i))] += 1
+    keys = sorted(counts, key=lambda k: (k[0], k[1] is None, _to_float(k[1]) or 0))
+    return [{"opentalk_code": c, "user_rank": r, "users": counts[(c, r)]} for c, r in keys]
+
+# ↓↓↓↓ 집계 잡 목록(원본 SnapshotJob 이름 기준) ↓↓↓↓
+AGGREGATE_JOBS: list[AggregateJob] = [
+    AggregateJob(name="study_progress_room_daily", source="study_progress",
+                 build=progress_room_daily, floats="progress"),
+    AggregateJob(name="study_cert_rank_dist", source="study_cert",
+                 build=cert_rank_distribution),
+]
+# ↑↑↑↑ 목록 수정 시 data/{name}.json 파일 생성 ↑↑↑↑
+
+def export_aggregate(job: AggregateJob, snapshot_path: str, force: bool = False) -> list[str]:
+    """
+    원본 스냅샷에서 집계 스냅샷(data/{name}.json)을 만들고 바뀐 파일 경로 목록을 반환.
+    - force=False이고 결과 파일이 이미 있으면(원본 스냅샷이 그대로면) 아무것도 하지 않음
+    - 원본을 행 dict 대신 columnar.Table로 적재해 컬럼 배열 위에서 계산
+    - 내용이 같으면 rows_sha256 비교로 파일을 건드리지 않음
+    """
+    out_path = f"{SNAPSHOT_DIR}/{job.name}.json"
+    if not force and os.path.exists(out_path):
+        return []
+    try:
+        data = serializer.load_file(snapshot_path)
+    except (FileNotFoundError, serializer.JSONDecodeError):
+        return []
+    table = columnar.Table(data, floats={c: _to_float for c in _parse_select_columns(job.floats or "")})
+    del data
+    rows = job.build(table)
+    tmp_path = out_path + ".tmp"
+    source = {"type": "aggregate", "snapshot": job.source, "build": job.build.__name__}
+    with _stage("serialize"):
+        row_count, rows_hash, file_hash = _write_snapshot_stream(tmp_path, rows, source)
+    _stage_bytes("serialize", os.path.getsize(tmp_path))
+    return [out_path] if _commit_tmp(tmp_path, out_path, row_count, rows_hash, file_hash) else []
+
+@dataclass
+class JobResult:
+    """
+    잡 1건의 실행 결과
+    - path: 생성된 파일 경로(실패 시 None)
+    - seconds: 소요 시간(초)
+    - changed_paths: 내용이 바뀌어 커밋이 필요한 파일들(스냅샷 + 샤드)
+    - error: 실패 시 예외 메시지
+    - stages: 단계별 {"seconds"(배타 시간), "calls", "bytes"(, "peak_alloc_bytes")}
+    - profile_path: EXPORT_PROFILE일 때 cProfile 결과(.prof) 경로
+    """
+    name: str
+    path: str | None
+    seconds: float
+    changed_paths: list[str] = field(default_factory=list)
+    error: str | None = None
+    stages: dict = field(default_factory=dict)
+    profile_path: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.changed_paths)
+
+def _run_job(job: SnapshotJob) -> JobResult:
+    """export_job을 실행하되 예외를 JobResult로 감싸 다른 잡에 영향을 주지 않도록 함(단계 기록 포함)"""
+    _tls.stages, _tls.stack, _tls.prefix = {}, [], ""
+    prof = cProfile.Profile() if EXPORT_PROFILE else None
+    t0 = time.perf_counter()
+    try:
+        if prof: prof.enable()
+        path, changed_paths = export_job(job)
+        result = JobResult(job.name, path, time.perf_counter() - t0, changed_paths=changed_paths)
+    except Exception as e:
+        result = JobResult(job.name, None, time.perf_counter() - t0, error=f"{type(e).__name__}: {e}")
+    finally:
+        if prof: prof.disable()
+        stages, _tls.stages = _tls.stages, None
+    result.stages = {k: {**v, "seconds": round(v["seconds"], 4)} for k, v in stages.items()}
+    if prof:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        result.profile_path = os.path.join(PROFILE_DIR, f"{job.name}.prof")
+        prof.dump_stats(result.profile_path)
+    return result
+
+def _format_stages(stages: dict) -> str:
+    """출력용 요약: 오래 걸린 단계 순 'name=1.23s'"""
+    top = sorted(stages.items(), key=lambda kv: -kv[1]["seconds"])
+    return " ".join(f"{k}={v['seconds']:.2f}s" for k, v in top if v["seconds"] >= 0.005)
+
+def run_jobs(jobs: list[SnapshotJob], max_workers: int | None = None) -> list[JobResult]:
+    """
+    JOB 목록을 스레드풀에서 병렬 실행하고 JOB 순서대로 결과를 반환.
+    - max_workers: 동시 실행 수(기본: 커넥션 풀 크기). 잡 하나는 동시에 커넥션 1개만 사용
+    - 전체 소요시간은 대략 가장 느린 잡의 시간
+    """
+    workers = max(1, min(max_workers or POOL_SIZE, len(jobs) or 1))
+    if EXPORT_PROFILE:
+        # 단계별 메모리 피크가 다른 잡과 섞이지 않도록 순차 실행
+        workers = 1
+        tracemalloc.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job") as ex:
+            results = list(ex.map(_run_job, jobs))
+    finally:
+        if EXPORT_PROFILE:
+            tracemalloc.stop()
+    for r in results:
+        if r.ok:
+            print(f"[JOB] {r.name}: {r.seconds:.2f}s{'' if r.changed else ' (unchanged)'} {_format_stages(r.stages)}")
+        else:
+            print(f"[JOB FAIL] {r.name}: {r.seconds:.2f}s {r.error}")
+    return results
+
+def write_run_report(results: list[JobResult], started_at: str, seconds: float, push: dict | None = None,
+                     path: str = RUN_REPORT_PATH) -> str:
+    """
+    실행 리포트(JSON) 기록 후 경로 반환
+    {"started_at", "seconds", "profile", "jobs": [{name, ok, seconds, changed_paths, error, stages, profile_path}],
+     "push": {"seconds", "files", "skipped"}}
+    """
+    report = {
+        "started_at": started_at,
+        "seconds": round(seconds, 4),
+        "profile": EXPORT_PROFILE,
+        "jobs": [{"name": r.name, "ok": r.ok, "seconds": round(r.seconds, 4), "changed_paths": r.changed_paths,
+                  "error": r.error, "stages": r.stages, "profile_path": r.profile_path} for r in results],
+        "push": push,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(serializer.dumps(report))
+    os.replace(tmp_path, path)
+    print(f"[OK] run report → {path}")
+    return path
 
 # -----------------------------
 # Git 유틸
@@ -289,6 +1428,25 @@ def _run(cmd: str, check: bool = True, echo: bool = True):
         print(cp.stdout.strip())
     return cp
 
+def _has_changes(paths: list[str]) -> bool:
+    """
+    주어진 경로 중 커밋되지 않은 변경(수정/신규)이 하나라도 있으면 True
+    """
+    if not paths:
+        return False
+    cp = subprocess.run(["git", "status", "--porcelain", "--", *paths], text=True, capture_output=True)
+    return bool((cp.stdout or "").strip())
+
+def _has_unpushed() -> bool:
+    """
+    upstream보다 앞선 로컬 커밋이 있으면 True(이전 실행에서 커밋 후 push만 실패한 경우 등)
+    upstream이 아직 없으면(최초 push 전) True
+    """
+    cp = subprocess.run(["git", "rev-list", "--count", "@{u}..HEAD"], text=True, capture_output=True)
+    if cp.returncode != 0:
+        return True
+    return (cp.stdout or "").strip() not in ("", "0")
+
 def _ensure_branch(branch: str):
     """
     현재 브랜치를 지정 브랜치로 강제(없으면 생성/리셋)
@@ -300,16 +1458,17 @@ def _ensure_branch(branch: str):
 
 def _ensure_gitattributes_for_snapshots():
     """
-    data/*.json 파일은 항상 ours 머지 전략으로 설정
+    data/*.json(+ 샤드 data/*/*.json, 압축본 .gz/.br) 파일은 항상 ours 머지 전략으로 설정
     - 다중 스냅샷 간 충돌 방지
     """
-    line = f"{SNAPSHOT_GLOB} merge=ours\n"
     ga = Path(".gitattributes")
     existing = ga.read_text(encoding="utf-8") if ga.exists() else ""
-    if line not in existing:
-        ga.write_text(existing + line, encoding="utf-8")
+    globs = [SNAPSHOT_GLOB, SHARD_GLOB, *COMPRESSED_GLOBS, COMPRESSED_SOURCE_GLOB]
+    lines = [f"{g} merge=ours\n" for g in globs if f"{g} merge=ours\n" not in existing]
+    if lines:
+        ga.write_text(existing + "".join(lines), encoding="utf-8")
         _run("git add .gitattributes", check=False)
-        _run('git commit -m "chore: set merge=ours for data/*.json" --allow-empty', check=False)
+        _run('git commit -m "chore: set merge=ours for snapshot json" --allow-empty', check=False)
         # ours 드라이버 설정(이미 설정돼 있어도 무해)
         _run('git config merge.ours.driver true', check=False)
 
@@ -377,9 +1536,27 @@ def push_files(paths: list[str], branch: str | None = None, allow_empty: bool =
 # -----------------------------
 
 if __name__ == "__main__":
-    # 1) 각 JOB 실행 → data/{name}.json 생성
-    out_files = [export_job(job) for job in JOBS]
+    started_at, run_t0 = _now_iso(), time.perf_counter()
+
+    # 1) 각 JOB 병렬 실행 → data/{name}.json 생성
+    results = run_jobs(JOBS)
+    out_files = [p for r in results if r.ok for p in r.changed_paths]
+
+    # 2) 바뀐 JSON들 + db.py 푸시(커밋할 변경도, 밀리지 않은 로컬 커밋도 없을 때만 생략)
+    push_t0 = time.perf_counter()
+    push_skipped = not _has_changes(out_files + ["db.py"]) and not _has_unpushed()
+    if not push_skipped:
+        push_files(paths=out_files + ["db.py"], branch=GIT_BRANCH, allow_empty=False)
+    else:
+        print("[SKIP] no snapshot changes; skip git commit/push")
+    push = {"seconds": round(time.perf_counter() - push_t0, 4), "files": len(out_files), "skipped": push_skipped}
+
+    # 3) 단계별 시간/바이트 리포트(JSON)
+    write_run_report(results, started_at, time.perf_counter() - run_t0, push)
 
-    # 2) 생성된 JSON들 + db.py 푸시
-    push_files(paths=out_files + ["db.py"], branch=GIT_BRANCH, allow_empty=True)
+    # 4) 실패한 잡이 있으면 비정상 종료코드로 알림(cron 모니터링용)
+    failed = [r.name for r in results if not r.ok]
+    if failed:
+        print(f"[ERROR] failed jobs: {', '.join(failed)}")
+        sys.exit(1)
 
@@ -3,21 +3,47 @@ let progressData = []; // study_progress.json.rows
 let certData = [];     // study_cert.json.rows (닉네임 보강용만 사용)
 let chart;
 let roomCodes = [];
+let manifests = null;  // 샤드 모드일 때만 {progress, cert} (data/{name}/manifest.json)
+const shardCache = new Map(); // 샤드 url → Promise<rows>
 
 const $ = s => document.querySelector(s);
 const progressUrl = 'data/study_progress.json?v=' + Date.now();
 const certUrl     = 'data/study_cert.json?v=' + Date.now();
+const progressManifestUrl = 'data/study_progress/manifest.json?v=' + Date.now();
+const certManifestUrl     = 'data/study_cert/manifest.json?v=' + Date.now();
 
 /* ========== 유틸 ========== */
+// 컬럼형 스냅샷({format:'columnar', columns:{이름: 배열 | {dict, codes}}}) → 행 배열
+function decodeColumnar(j){
+  const names = Object.keys(j.columns);
+  const cols = names.map(n=>{
+    const c = j.columns[n];
+    return Array.isArray(c) ? c : c.codes.map(i=>c.dict[i]);
+  });
+  const n = cols.length ? cols[0].length : 0;
+  const rows = new Array(n);
+  for(let i=0;i<n;i++){
+    const r = {};
+    for(let k=0;k<names.length;k++) r[names[k]] = cols[k][i];
+    rows[i] = r;
+  }
+  return rows;
+}
+// 스냅샷 rows 추출(행 형식 / 컬럼형 공통)
+function getSnapshotRows(j){
+  if (j && j.format==='columnar' && j.columns) return decodeColumnar(j);
+  if (j && Array.isArray(j.rows)) return j.rows;
+  return [];
+}
 // progress JSON(rows 전용) 파싱
 function getProgressRows(pj){
-  if (pj && Array.isArray(pj.rows)) return pj.rows;
+  if (pj && (Array.isArray(pj.rows) || pj.format==='columnar')) return getSnapshotRows(pj);
   if (pj && Array.isArray(pj.json_study_user_progress)) return pj.json_study_user_progress; // 예비
   return [];
 }
 // cert JSON(rows 전용) 파싱
 function getCertRows(cj){
-  if (cj && Array.isArray(cj.rows)) return cj.rows;
+  if (cj && (Array.isArray(cj.rows) || cj.format==='columnar')) return getSnapshotRows(cj);
   if (cj && Array.isArray(cj.json_study_cert)) return cj.json_study_cert; // 예비
   return [];
 }
@@ -57,6 +83,41 @@ function fmtDateLabel(iso){
   return `${mm}/${dd}(${w})`;
 }
 
+/* ========== 샤드 로드 ========== */
+// manifest 2개를 받아오면 샤드 모드, 하나라도 없으면 null(전체 파일 모드로 폴백)
+async function loadManifests(){
+  try{
+    const [p,c] = await Promise.all([
+      fetch(progressManifestUrl,{cache:'no-store'}),
+      fetch(certManifestUrl,{cache:'no-store'})
+    ]);
+    if(!p.ok || !c.ok) return null;
+    const progress = await p.json(), cert = await c.json();
+    return (progress && progress.shards && cert && cert.shards) ? {progress, cert} : null;
+  }catch(e){
+    return null;
+  }
+}
+// 방 1개 샤드: url에 내용 해시를 붙여 내용이 같으면 브라우저 캐시를 그대로 재사용
+function loadShard(dir, manifest, code){
+  const s = manifest.shards[code];
+  if(!s) return Promise.resolve([]);
+  const url = `data/${dir}/${s.file}?v=${String(s.rows_sha256).slice(0,16)}`;
+  if(!shardCache.has(url)){
+    shardCache.set(url, fetch(url).then(r=>r.ok ? r.json() : {}).then(getSnapshotRows));
+  }
+  return shardCache.get(url);
+}
+// 선택한 방의 progress/cert 샤드를 현재 데이터로 설정(전체 파일 모드면 아무것도 안 함)
+async function loadRoom(code){
+  if(!manifests) return;
+  if(!code){ progressData = []; certData = []; return; }
+  [progressData, certData] = await Promise.all([
+    loadShard('study_progress', manifests.progress, code),
+    loadShard('study_cert', manifests.cert, code)
+  ]);
+}
+
 /* ========== 차트 ========== */
 function ensureChart(labels, data){
   const ctx = document.getElementById('progressChart').getContext('2d');
@@ -69,11 +130,10 @@ function ensureChart(labels, data){
 }
 
 /* ========== 드롭다운/목록 ========== */
-// ★ 방 목록은 progress(rows[].opentalk_code)만 사용
+// ★ 방 목록은 progress(rows[].opentalk_code 또는 manifest 샤드 키)만 사용
 function fillRooms(){
-  roomCodes = [...new Set(
-    progressData.map(r=>r.opentalk_code).filter(Boolean)
-  )].sort((a,b)=>a.localeCompare(b,'ko'));
+  const codes = manifests ? Object.keys(manifests.progress.shards) : progressData.map(r=>r.opentalk_code);
+  roomCodes = [...new Set(codes.filter(Boolean))].sort((a,b)=>a.localeCompare(b,'ko'));
 
   const sel = $("#roomSelect");
   sel.innerHTML = '<option value="">단톡방 명을 선택하세요 ▼</option>';
@@ -156,8 +216,9 @@ function renderTable(code){
 }
 
 /* ========== 이벤트 ========== */
-$('#roomSelect').addEventListener('change', ()=>{
+$('#roomSelect').addEventListener('change', async ()=>{
   const code = getSelectedRoomCode();
+  await loadRoom(code);
   fillNicknames(code);
   updateChartTitle(code, ($('#nickInput').value||'').trim());
 });
@@ -165,9 +226,10 @@ $('#nickInput').addEventListener('input', ()=>{
   const code = getSelectedRoomCode();
   updateChartTitle(code, ($('#nickInput').value||'').trim());
 });
-$('#applyBtn').addEventListener('click', ()=>{
+$('#applyBtn').addEventListener('click', async ()=>{
   const code = getSelectedRoomCode();
   const nick = ($('#nickInput').value || '').trim();
+  await loadRoom(code);
   updateChartTitle(code, nick);
   renderChart(code, nick);
   renderTable(code);
@@ -175,17 +237,22 @@ $('#applyBtn').addEventListener('click', ()=>{
 
 /* ========== 데이터 로드 ========== */
 async function load(){
-  const [p,c] = await Promise.all([
-    fetch(progressUrl,{cache:'no-store'}),
-    fetch(certUrl,{cache:'no-store'})
-  ]);
-  const pj = await p.json().catch(()=>({}));
-  const cj = await c.json().catch(()=>({}));
+  // 샤드 모드: manifest만 받고, 방 데이터는 선택 시 해당 방 샤드만 받음
+  manifests = await loadManifests();
+  let pj = manifests ? manifests.progress : {};
+  if(!manifests){
+    const [p,c] = await Promise.all([
+      fetch(progressUrl,{cache:'no-store'}),
+      fetch(certUrl,{cache:'no-store'})
+    ]);
+    pj = await p.json().catch(()=>({}));
+    const cj = await c.json().catch(()=>({}));
 
-  // 방 목록은 progress(rows)만 사용
-  progressData = getProgressRows(pj);
-  // 닉네임 보강용 cert(rows) (방 리스트에는 영향 없음)
-  certData = getCertRows(cj);
+    // 방 목록은 progress(rows)만 사용
+    progressData = getProgressRows(pj);
+    // 닉네임 보강용 cert(rows) (방 리스트에는 영향 없음)
+    certData = getCertRows(cj);
+  }
 
   fillRooms();
   ensureChart([],[]);
@@ -8,25 +8,42 @@
 # - 로컬에서 python main.py 실행 시 push만 수행(서버 미기동)
 # - Render에선 uvicorn main:app ... 으로 서버 실행
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import HTMLResponse
-from contextlib import asynccontextmanager
-import json, os, subprocess
-from collections import defaultdict
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, Response, FileResponse, PlainTextResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from contextlib import asynccontextmanager, contextmanager
+import os, re, gzip, subprocess, hashlib, base64, time
+from bisect import bisect_right
+from math import fsum
+import serializer
+import columnar
+import metrics
+from collections import defaultdict, OrderedDict
 from typing import Optional
 import argparse
 from fastapi.responses import HTMLResponse, JSONResponse
 from datetime import datetime, date
-import threading
+import threading, asyncio
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: 변환 잠금 없이 동작(os.replace라 결과는 같음)
+    fcntl = None
 
 
 BASE_DIR = os.path.dirname(__file__)
 
-# --- ★ 파일 경로(원하면 바꾸세요) ---
-PROGRESS_JSON_PATH = os.path.join(BASE_DIR, "data", "study_progress.json")
-CERT_JSON_PATH = os.path.join(BASE_DIR, "data", "study_cert.json")
+# --- ★ 파일 경로(원하면 바꾸세요; DATA_DIR 환경변수로 스냅샷 폴더 교체 가능 - 벤치마크 등) ---
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
+PROGRESS_JSON_PATH = os.path.join(DATA_DIR, "study_progress.json")
+CERT_JSON_PATH = os.path.join(DATA_DIR, "study_cert.json")
+# db.py 집계 잡(AGGREGATE_JOBS) 결과: 방별 일자 롤업 / 랭크 분포
+ROOM_DAILY_JSON_PATH = os.path.join(DATA_DIR, "study_progress_room_daily.json")
+RANK_DIST_JSON_PATH = os.path.join(DATA_DIR, "study_cert_rank_dist.json")
 BASE_DIR = os.path.dirname(__file__)
-DATA_PATH = os.path.join(BASE_DIR, "data", "progress.json")
+DATA_PATH = os.path.join(DATA_DIR, "progress.json")
 GIT_BRANCH = os.getenv("GIT_BRANCH", "main")
 
 def _env_bool(name: str, default: bool=False) -> bool:
@@ -92,46 +109,229 @@ def _push_once():
 
 
 # -------------------- 데이터 로드 --------------------
-def _load_rows():
-    try:
-        with open(DATA_PATH, encoding="utf-8-sig") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        raise HTTPException(500, detail="progress.json not found")
-    except json.JSONDecodeError as e:
-        raise HTTPException(500, detail={"error":"invalid JSON","msg":e.msg,"lineno":e.lineno,"colno":e.colno})
-    if isinstance(data, list):
-        return data
-    if isinstance(data, dict) and isinstance(data.get("rows"), list):
-        return data["rows"]
-    raise HTTPException(500, detail="Unexpected JSON format")
-
 
 
 # --- 파일 캐시: 파일 mtime이 같으면 메모리 재사용 ---
+# (재)로드 시 행 dict 대신 array 기반 columnar.Table로 적재(문자열 인턴, 날짜/숫자 1회 변환)
+# 경로별 인덱스 빌더가 있으면 인덱스도 함께 만들어 둠 → 요청은 dict 조회 + 필요한 행만 복원
 _cache_lock = threading.Lock()
-_cache = {}  # key=path -> {"mtime": float, "rows": list}
+_cache = {}  # key=path -> {"mtime": float, "table": columnar.Table, "index": dict|None}
 
-def _load_rows_from(path: str):
-    try:
-        mtime = os.path.getmtime(path)
-        with _cache_lock:
-            hit = _cache.get(path)
-            if hit and hit["mtime"] == mtime:
-                return hit["rows"]
-        with open(path, encoding="utf-8-sig") as f:
-            data = json.load(f)
+def _parse_table(path: str, spec: dict) -> columnar.Table:
+    data = serializer.load_file(path)
+    if not columnar.is_columnar(data):
         rows = data if isinstance(data, list) else (data.get("rows") or [])
         if not isinstance(rows, list):
             raise HTTPException(500, detail=f"Unexpected JSON format: {os.path.basename(path)}")
+    return columnar.Table(data, normalize=spec.get("normalize"), floats=spec.get("floats"))
+
+# --- 멀티 워커 모드(SNAPSHOT_MMAP=true): data/{name}.json 옆 .colbin을 모든 워커가 mmap으로 공유 ---
+# 첫 워커가 1회 변환(파일 잠금), 나머지는 같은 파일을 매핑만 함 → 워커별 RSS는 인덱스/사전 값 정도
+# 원본 mtime_ns/size와 적재 규칙(_TABLE_SPECS 컬럼 목록)이 헤더 meta와 다르면 재변환
+# 예) SNAPSHOT_MMAP=true uvicorn main:app --workers 4
+SNAPSHOT_MMAP = _env_bool("SNAPSHOT_MMAP", False)
+
+def _binary_path(path: str) -> str:
+    return os.path.splitext(path)[0] + columnar.BINARY_EXT
+
+@contextmanager
+def _file_lock(lock_path: str):
+    if fcntl is None:
+        yield; return
+    with open(lock_path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try: yield
+        finally: fcntl.flock(f, fcntl.LOCK_UN)
+
+def _open_shared_table(path: str, spec: dict) -> columnar.Table:
+    st = os.stat(path)
+    source = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+              "normalize": sorted(spec.get("normalize") or {}), "floats": sorted(spec.get("floats") or {})}
+    bin_path = _binary_path(path)
+    with _file_lock(bin_path + ".lock"):
+        try:
+            table, meta = columnar.Table.open(bin_path)
+            if meta.get("source") == source:
+                return table
+        except (FileNotFoundError, ValueError):
+            pass
+        table = _parse_table(path, spec)
+        try:
+            table.save(bin_path, {"source": source})
+        except OSError as e:
+            _log(f"[mmap warn] {os.path.basename(bin_path)}: {e}")
+            return table
+        _log(f"[mmap] converted {os.path.basename(path)} -> {os.path.basename(bin_path)}")
+        # 방금 파싱한 사본 대신 공유 매핑을 사용(파싱본은 여기서 해제)
+        return columnar.Table.open(bin_path)[0]
+
+# --- 계측(/metrics): 요청 경로 비용은 카운터/히스토그램 덧셈뿐, 나머지는 스크레이프 시 계산 ---
+def _dataset(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+_M_CACHE = metrics.Counter("snapshot_cache_requests_total", "스냅샷 캐시 조회(hit/miss)", ["dataset", "result"])
+_M_LOAD = metrics.Histogram("snapshot_load_seconds", "스냅샷 파싱+적재+인덱싱 소요", ["dataset"],
+                            buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+_M_RESP = metrics.Counter("response_cache_requests_total", "직렬화 응답 캐시 조회(hit/miss)", ["endpoint", "result"])
+_M_HTTP = metrics.Histogram("http_request_duration_seconds", "라우트별 요청 지연", ["route", "method"])
+_M_HTTP_STATUS = metrics.Counter("http_requests_total", "라우트별 응답 수", ["route", "method", "status"])
+
+def _build_entry(path: str, mtime: float) -> dict:
+    """path를 파싱/적재/인덱싱한 뒤 완성된 entry를 _cache에 한 번에 교체(참조 교체)"""
+    t0 = time.perf_counter()
+    spec = _TABLE_SPECS.get(path, {})
+    table = _open_shared_table(path, spec) if SNAPSHOT_MMAP else _parse_table(path, spec)
+    builder = _INDEX_BUILDERS.get(path)
+    entry = {"mtime": mtime, "table": table, "index": builder(table) if builder else None,
+             "load_seconds": time.perf_counter() - t0}
+    _M_LOAD.observe((_dataset(path),), entry["load_seconds"])
+    with _cache_lock:
+        _cache[path] = entry
+    _invalidate_responses(path)
+    return entry
+
+# --- single-flight: 같은 경로의 적재는 한 번에 하나만, 나머지는 그 결과를 기다려 공유 ---
+_inflight = {}  # key=path -> {"done": Event, "entry": dict|None, "error": Exception|None}
+
+def _build_once(path: str, mtime: float) -> dict:
+    with _cache_lock:
+        # 캐시 확인 뒤 락을 잡기 전에 직전 리더가 끝냈으면 그 결과를 사용(같은 파일을 다시 파싱하지 않음)
+        hit = _cache.get(path)
+        if hit and hit["mtime"] == mtime:
+            return hit
+        flight = _inflight.get(path)
+        leader = flight is None
+        if leader:
+            flight = _inflight[path] = {"done": threading.Event(), "entry": None, "error": None}
+    if not leader:
+        flight["done"].wait()
+        if flight["error"] is not None:
+            raise flight["error"]
+        return flight["entry"]
+    try:
+        flight["entry"] = _build_entry(path, mtime)
+        return flight["entry"]
+    except BaseException as e:
+        flight["error"] = e
+        raise
+    finally:
         with _cache_lock:
-            _cache[path] = {"mtime": mtime, "rows": rows}
-        return rows
+            _inflight.pop(path, None)
+        flight["done"].set()
+
+def _load_entry(path: str) -> dict:
+    with _cache_lock:
+        hit = _cache.get(path)
+    # 감시 스레드가 돌고 있으면 stat 없이 현재 참조를 그대로 사용(갱신은 감시 스레드 담당)
+    if hit and _watching():
+        _M_CACHE.inc((_dataset(path), "hit"))
+        return hit
+    try:
+        mtime = os.path.getmtime(path)
+        if hit and hit["mtime"] == mtime:
+            _M_CACHE.inc((_dataset(path), "hit"))
+            return hit
+        _M_CACHE.inc((_dataset(path), "miss"))
+        return _build_once(path, mtime)
     except FileNotFoundError:
         raise HTTPException(500, detail=f"{os.path.basename(path)} not found")
-    except json.JSONDecodeError as e:
+    except serializer.JSONDecodeError as e:
         raise HTTPException(500, detail={"file": os.path.basename(path), "error": "invalid JSON","msg":e.msg,"lineno":e.lineno,"colno":e.colno})
 
+# --- 비동기 핸들러용: 파싱/재적재(stat 포함)는 전용 스레드풀에서, 이벤트 루프는 메모리 조회만 ---
+# 기본 스레드풀(anyio, sync 핸들러/FileResponse 공용)과 분리 → 큰 스냅샷 파싱이 다른 요청을 막지 않음
+LOAD_WORKERS = max(1, int(os.getenv("LOAD_WORKERS", "2")))
+_load_executor = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="snapshot-load")
+
+async def _aload_entry(path: str) -> dict:
+    """_load_entry의 async 버전: 감시 중 캐시 히트면 즉시 반환, 아니면 전용 스레드풀에서 확인/적재"""
+    with _cache_lock:
+        hit = _cache.get(path)
+    if hit and _watching():
+        _M_CACHE.inc((_dataset(path), "hit"))
+        return hit
+    return await asyncio.get_running_loop().run_in_executor(_load_executor, _load_entry, path)
+
+
+# --- 스냅샷 감시: 백그라운드에서 mtime 폴링 → 새 스냅샷을 미리 파싱/인덱싱한 뒤 참조 교체 ---
+# 요청 경로에서는 stat/파싱이 사라지고, 교체 전까지는 이전 스냅샷을 그대로 응답
+SNAPSHOT_WATCH = _env_bool("SNAPSHOT_WATCH", True)
+SNAPSHOT_WATCH_INTERVAL = float(os.getenv("SNAPSHOT_WATCH_INTERVAL", "2"))
+_watch_stop = threading.Event()
+_watch_thread = None
+
+def _watching() -> bool:
+    return _watch_thread is not None and _watch_thread.is_alive()
+
+def _watched_paths() -> set:
+    with _cache_lock:
+        return set(_TABLE_SPECS) | set(_cache)
+
+_watch_failed = {}  # path -> 적재에 실패한 파일의 (mtime, size): 파일이 바뀔 때까지 재시도/경고하지 않음
+
+def _refresh(path: str) -> bool:
+    """
+    path의 mtime이 캐시와 다르면 새로 적재해 교체하고 True 반환(파일이 없으면 기존 유지)
+    - 깨진 파일은 (mtime, size)를 기억해 두고 바뀌기 전까지 건너뜀(폴링마다 다시 파싱/경고하지 않도록)
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    mtime = st.st_mtime
+    with _cache_lock:
+        hit = _cache.get(path)
+    if hit and hit["mtime"] == mtime:
+        return False
+    if _watch_failed.get(path) == (mtime, st.st_size):
+        return False
+    try:
+        _build_once(path, mtime)
+    except Exception:
+        _watch_failed[path] = (mtime, st.st_size)
+        raise
+    _watch_failed.pop(path, None)
+    return True
+
+def _refresh_all():
+    for path in sorted(_watched_paths()):
+        try:
+            if _refresh(path):
+                _log(f"[watch] loaded {os.path.basename(path)}")
+        except Exception as e:
+            # 깨진 파일 등: 이전 스냅샷을 계속 사용
+            _log(f"[watch warn] {os.path.basename(path)}: {getattr(e, 'detail', e)}")
+
+def _watch_loop():
+    while not _watch_stop.wait(SNAPSHOT_WATCH_INTERVAL):
+        _refresh_all()
+
+def _start_watcher():
+    """알려진 스냅샷을 미리 적재한 뒤 폴링 스레드 시작"""
+    global _watch_thread
+    if _watching(): return
+    _refresh_all()
+    _watch_stop.clear()
+    _watch_thread = threading.Thread(target=_watch_loop, name="snapshot-watch", daemon=True)
+    _watch_thread.start()
+
+def _stop_watcher():
+    global _watch_thread
+    _watch_stop.set()
+    if _watch_thread is not None:
+        _watch_thread.join(timeout=SNAPSHOT_WATCH_INTERVAL + 1)
+    _watch_thread = None
+
+def _load_table(path: str) -> columnar.Table:
+    return _load_entry(path)["table"]
+
+def _load_rows_from(path: str):
+    # 호환용: 매 호출마다 전체 행 dict를 새로 만듦 → 핫패스에서는 _load_table/_load_index 사용
+    return _load_table(path).rows()
+
+def _load_index(path: str) -> dict:
+    return _load_entry(path)["index"]
+
 def _to_date(s) -> date|None:
     if not s: return None
     s = str(s)[:10]
@@ -145,6 +345,403 @@ def _to_num(x):
     except:
         return None
 
+def _to_iso(s) -> str|None:
+    d = _to_date(s)
+    return d.isoformat() if d else None
+
+def _clean(s) -> str:
+    return str(s).strip() if s is not None else ""
+
+# 데이터셋 레지스트리: 캐시/감시 대상 스냅샷 경로와 Table 적재 규칙(사전 값마다 1회만 적용)
+# - normalize: 문자열 정리/날짜 ISO 정규화, floats: 숫자 컬럼을 array('d')로
+_TABLE_SPECS = {
+    DATA_PATH: {},
+    PROGRESS_JSON_PATH: {
+        "normalize": {"opentalk_code": _clean, "nickname": _clean, "progress_date": _to_iso},
+        "floats": {"progress": _to_num},
+    },
+    CERT_JSON_PATH: {
+        "normalize": {"opentalk_code": _clean},
+    },
+    ROOM_DAILY_JSON_PATH: {
+        "normalize": {"opentalk_code": _clean, "progress_date": _to_iso},
+        "floats": {"avg_progress": _to_num, "median_progress": _to_num},
+    },
+    RANK_DIST_JSON_PATH: {
+        "normalize": {"opentalk_code": _clean},
+    },
+}
+
+
+# --- study_progress 인덱스: 로드 시 1회 구축 ---
+def _build_progress_index(t: columnar.Table) -> dict:
+    """
+    - codes: 단톡방 코드 정렬 목록
+    - nicknames: 코드 → 정렬된 닉네임 목록 (None 키 = 전체 닉네임)
+    - order: (코드, 닉네임, 날짜) 순으로 정렬한 행 번호 array
+    - spans: (코드, 닉네임) → order 안의 [start, end) 구간(날짜 오름차순)
+    - room_aggs: 코드 → 날짜 → (mean, median, count) — 방 멤버 전체 기준(NaN 제외), 선택 닉네임과 무관
+    빈 스냅샷(rows: [])이거나 필수 컬럼이 없으면 빈 인덱스(엔드포인트는 빈 목록 응답)
+    """
+    if not {"opentalk_code", "nickname", "progress_date"} <= set(t.names):
+        return {"codes": [], "nicknames": {None: []}, "order": array("i"), "spans": {}, "room_aggs": {}}
+    code_v, code_c = t.dict_col("opentalk_code")
+    nick_v, nick_c = t.dict_col("nickname")
+    date_v, date_c = t.dict_col("progress_date")
+    names_by_code = defaultdict(set)
+    groups = defaultdict(list)
+    for i in range(len(t)):
+        code, nick = code_v[code_c[i]], nick_v[nick_c[i]]
+        if not code or not nick: continue
+        names_by_code[code].add(nick)
+        if date_v[date_c[i]] is None: continue
+        groups[(code, nick)].append(i)
+
+    order = array("i")
+    spans = {}
+    for key, idx in groups.items():
+        idx.sort(key=lambda i: date_v[date_c[i]])
+        spans[key] = (len(order), len(order) + len(idx))
+        order.extend(idx)
+
+    # 방별 날짜 집계: 방 멤버 전체 값을 (방, 날짜)로 모아 1회 계산
+    room_vals = defaultdict(lambda: defaultdict(list))
+    if "progress" in t.names:
+        prog = t.float_col("progress")
+        for (code, _), idx in groups.items():
+            by_date = room_vals[code]
+            for i in idx:
+                v = prog[i]
+                if v == v: by_date[date_c[i]].append(v)
+    room_aggs = {code: {date_v[c]: _value_stats(vals) for c, vals in by_date.items()}
+                 for code, by_date in room_vals.items()}
+
+    nicknames = {code: sorted(names) for code, names in names_by_code.items()}
+    nicknames[None] = sorted(set().union(*names_by_code.values()))
+    return {"codes": sorted(names_by_code), "nicknames": nicknames, "order": order, "spans": spans,
+            "room_aggs": room_aggs}
+
+def _value_stats(vals: list) -> tuple:
+    """값 목록(NaN 제외)의 (mean, median, count), 비어 있으면 (None, None, 0)"""
+    col = sorted(vals)
+    n = len(col)
+    if not n: return None, None, 0
+    return fsum(col) / n, (col[n // 2] if n % 2 else (col[n // 2 - 1] + col[n // 2]) / 2), n
+
+def _progress_series(entry: dict, opentalk: str, nickname: str) -> tuple[list, list]:
+    """study_progress entry의 인덱스 구간 행만 (labels, data)로 복원 — 날짜/숫자는 이미 변환돼 있음"""
+    span = entry["index"]["spans"].get((opentalk, nickname))
+    if not span: return [], []
+    t = entry["table"]
+    date_v, date_c = t.dict_col("progress_date")
+    prog = t.float_col("progress")
+    rows = entry["index"]["order"][span[0]:span[1]]
+    return [date_v[date_c[i]] for i in rows], [None if prog[i] != prog[i] else prog[i] for i in rows]
+
+def _series_matrix(entry: dict, opentalk: str, nicknames: list) -> tuple[list, array]:
+    """
+    방 하나의 여러 닉네임을 같은 labels(선택 닉네임 날짜 합집합)에 맞춘 행렬로 1회에 구성
+    - 반환: (labels, values) — values는 len(nicknames) x len(labels) 행 우선 array('d'), 결측 NaN
+    """
+    idx, t = entry["index"], entry["table"]
+    date_v, date_c = t.dict_col("progress_date")
+    prog = t.float_col("progress")
+    order = idx["order"]
+    spans = [idx["spans"].get((opentalk, n)) for n in nicknames]
+    seen = set()
+    for sp in spans:
+        if sp: seen.update(date_c[i] for i in order[sp[0]:sp[1]])
+    label_codes = sorted(seen, key=date_v.__getitem__)
+    col = {c: j for j, c in enumerate(label_codes)}
+    width = len(label_codes)
+    values = array("d", [float("nan")]) * (len(nicknames) * width)
+    for u, sp in enumerate(spans):
+        if not sp: continue
+        base = u * width
+        for i in order[sp[0]:sp[1]]:
+            values[base + col[date_c[i]]] = prog[i]
+    return [date_v[c] for c in label_codes], values
+
+def _room_aggregates(entry: dict, opentalk: str, labels: list) -> dict:
+    """labels(날짜)별 방 전체 mean/median/count — 인덱스에 미리 계산된 값을 응답 labels 순서로 꺼냄"""
+    aggs = entry["index"]["room_aggs"].get(opentalk, {})
+    stats = [aggs.get(d, (None, None, 0)) for d in labels]
+    return {"mean": [s[0] for s in stats], "median": [s[1] for s in stats], "count": [s[2] for s in stats]}
+
+def _series_batch_payload(entry: dict, opentalk: str, nicknames: list | None, fmt: str) -> dict:
+    names = list(dict.fromkeys(nicknames)) if nicknames else entry["index"]["nicknames"].get(opentalk, [])
+    labels, values = _series_matrix(entry, opentalk, names)
+    width = len(labels)
+    out = {"ok": True, "opentalk": opentalk, "labels": labels, "nicknames": names,
+           "aggregates": _room_aggregates(entry, opentalk, labels)}
+    flat = [None if v != v else v for v in values]
+    if fmt == "matrix":
+        out["matrix"] = {"shape": [len(names), width], "values": flat}
+    else:
+        out["series"] = [{"nickname": n, "data": flat[u * width:(u + 1) * width]} for u, n in enumerate(names)]
+    return out
+
+# --- progress.json(차트) 파생 데이터: /chart, /chart_grouped 응답 재료를 로드 시 1회 계산 ---
+def _grouped_series(grid: dict, groups: list, labels: list) -> list:
+    out = []
+    for g in groups:
+        by_date = grid[g]
+        out.append({
+            "group": g,
+            "rate": [by_date.get(d, {}).get("rate") for d in labels],
+            "increased": [by_date.get(d, {}).get("increased") for d in labels],
+            "total": [by_date.get(d, {}).get("total") for d in labels],
+        })
+    return out
+
+def _build_chart_index(t: columnar.Table) -> dict:
+    """
+    - points: /chart 포인트(날짜 오름차순)
+    - grid: 그룹 → 날짜 → {rate, increased, total}, groups: 그룹 정렬 목록
+    - all: 필터 없는 /chart_grouped의 labels/series
+    """
+    pts = []
+    grid = defaultdict(dict)
+    for r in t.rows():
+        d = r.get("progress_date")
+        if not d:  # 날짜 없는 행은 제외
+            continue
+        pts.append({
+            "date": d,
+            "group": r.get("study_group_title"),
+            "increased": r.get("increased_users"),
+            "total": r.get("total_users"),
+            "rate": r.get("rate"),
+            # 필요하면 아래에 추가 필드 더 넣기
+        })
+        grid[r.get("study_group_title") or "전체"][d] = {
+            "rate": r.get("rate"),
+            "increased": r.get("increased_users"),
+            "total": r.get("total_users"),
+        }
+    # 문자열 날짜 기준 정렬(YYYY-MM-DD 가정)
+    pts.sort(key=lambda x: x["date"])
+    groups = sorted(grid)
+    labels = sorted({d for by_date in grid.values() for d in by_date})
+    return {"points": pts, "grid": dict(grid), "groups": groups,
+            "all": {"labels": labels, "series": _grouped_series(grid, groups, labels)}}
+
+# --- study_cert 인덱스: 방별로 (user_rank, name) 순 정렬해 두고 요청은 구간 슬라이스만 ---
+# cursor 키는 (랭크, 이름, 정렬 위치): 랭크/이름이 겹쳐도(이름 없음 포함) 위치로 고유 → bisect가 행을 건너뛰지 않음
+CERT_FIELDS = ["name", "user_rank", "cert_days_count", "average_week"]
+
+def _cert_sort_key(rank, name) -> tuple:
+    # 보기 좋게 정렬: 랭크 오름차순(없으면 맨 뒤), 이름
+    return (rank if rank is not None else 9999, name or "")
+
+def _build_cert_index(t: columnar.Table) -> dict:
+    """
+    - rooms: 코드 → 정렬된 행 번호 array
+    - keys: 코드 → 같은 순서의 (랭크, 이름, 위치) 키 목록(cursor 위치 bisect용, 위치로 고유)
+    """
+    if "opentalk_code" not in t.names:
+        return {"rooms": {}, "keys": {}}
+    code_v, code_c = t.dict_col("opentalk_code")
+    by_room = defaultdict(list)
+    for i, c in enumerate(code_c):
+        by_room[code_v[c]].append(i)
+    rooms, keys = {}, {}
+    for code, idx in by_room.items():
+        ks = [_cert_sort_key(t.value("user_rank", i), t.value("name", i)) for i in idx]
+        order = sorted(range(len(idx)), key=ks.__getitem__)
+        rooms[code] = array("i", (idx[j] for j in order))
+        keys[code] = [(*ks[j], pos) for pos, j in enumerate(order)]
+    return {"rooms": rooms, "keys": keys}
+
+# --- 집계 스냅샷 인덱스: 방 → 행 번호(db.py가 (방, 날짜/랭크) 순으로 정렬해 기록) ---
+def _build_room_index(t: columnar.Table) -> dict:
+    if "opentalk_code" not in t.names:
+        return {}
+    code_v, code_c = t.dict_col("opentalk_code")
+    rooms = defaultdict(lambda: array("i"))
+    for i, c in enumerate(code_c):
+        rooms[code_v[c]].append(i)
+    return dict(rooms)
+
+def _room_columns(entry: dict, opentalk: str, names: list) -> dict:
+    """방 하나의 행들을 컬럼별 배열로 반환(행 수 = 날짜 수/랭크 수)"""
+    t = entry["table"]
+    idx = entry["index"].get(opentalk, ())
+    return {name: [t.value(name, i) for i in idx] for name in names}
+
+_INDEX_BUILDERS = {
+    PROGRESS_JSON_PATH: _build_progress_index,
+    CERT_JSON_PATH: _build_cert_index,
+    DATA_PATH: _build_chart_index,
+    ROOM_DAILY_JSON_PATH: _build_room_index,
+    RANK_DIST_JSON_PATH: _build_room_index,
+}
+
+
+# --- 페이지네이션/필드 선택 공통: cursor는 마지막 위치/키를 담은 base64url(JSON) ---
+def _encode_cursor(key: list) -> str:
+    return base64.urlsafe_b64encode(serializer.dumps(key)).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, size: int) -> list:
+    """cursor → 길이 size인 리스트(형식이 틀리면 400)"""
+    try:
+        key = serializer.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:  # base64/UTF-8/JSON 오류 모두 ValueError 하위
+        key = None
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(400, detail="invalid cursor")
+    return key
+
+def _parse_fields(fields: str | None, allowed: list) -> list:
+    """fields=a,b → 컬럼 목록(없으면 allowed 전체, 모르는 컬럼이면 400)"""
+    if not fields:
+        return list(allowed)
+    want = [f.strip() for f in fields.split(",") if f.strip()]
+    bad = [f for f in want if f not in allowed]
+    if bad:
+        raise HTTPException(400, detail={"error": "unknown fields", "fields": bad, "allowed": allowed})
+    return want
+
+
+# --- 응답 캐시: (엔드포인트, 정규화된 파라미터, 원본 mtime) → 직렬화된 bytes + ETag ---
+# 원본 파일 mtime이 바뀌거나 _cache가 새로 로드하면 해당 경로의 응답 전체 폐기
+_resp_lock = threading.Lock()
+_resp_cache = {}  # key=path -> {"mtime": float, "bytes": int, "items": OrderedDict{(endpoint, params): {"etag", "body", "gzip"}}}
+
+# 원본 파일별 응답 캐시 상한(LRU): 항목 수 / 본문 바이트 합(쿼리 값이 자유로워 상한 없이는 메모리가 계속 늘 수 있음)
+RESPONSE_CACHE_MAX_ITEMS = int(os.getenv("RESPONSE_CACHE_MAX_ITEMS", "4096"))
+RESPONSE_CACHE_MAX_BYTES = int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+# 이 크기 미만 응답은 압축하지 않음(헤더/CPU 비용이 더 큼)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+
+def _invalidate_responses(path: str):
+    with _resp_lock:
+        _resp_cache.pop(path, None)
+
+def _store_response(path: str, mtime: float, key: tuple, hit: dict):
+    """응답을 path 슬롯에 넣고 상한을 넘으면 오래 안 쓴 것부터 제거(바이트는 비압축 본문 기준)"""
+    with _resp_lock:
+        slot = _resp_cache.get(path)
+        if not slot or slot["mtime"] != mtime:
+            slot = _resp_cache[path] = {"mtime": mtime, "bytes": 0, "items": OrderedDict()}
+        items = slot["items"]
+        old = items.pop(key, None)
+        if old is not None:
+            slot["bytes"] -= len(old["body"])
+        items[key] = hit
+        slot["bytes"] += len(hit["body"])
+        while len(items) > 1 and (len(items) > RESPONSE_CACHE_MAX_ITEMS or slot["bytes"] > RESPONSE_CACHE_MAX_BYTES):
+            _, dropped = items.popitem(last=False)
+            slot["bytes"] -= len(dropped["body"])
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm: return False
+    tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+    return "*" in tags or etag in tags
+
+def _accepts(request: Request, encoding: str) -> bool:
+    """Accept-Encoding에 encoding이 q>0으로 포함돼 있으면 True"""
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != encoding: continue
+        q = params.strip()
+        return not (q.startswith("q=") and _to_num(q[2:]) == 0)
+    return False
+
+async def _cached_json(request: Request, path: str, key: tuple, build, known=None) -> Response:
+    """
+    build(entry)가 만드는 JSON 응답을 원본(path) entry의 mtime 기준으로 캐시해 bytes 그대로 반환.
+    - entry는 _aload_entry로 확보(적재가 필요하면 전용 스레드풀) → build는 메모리 조회만
+    - 원본별 LRU(RESPONSE_CACHE_MAX_ITEMS / RESPONSE_CACHE_MAX_MB), known(entry)가 False면(없는 방 등) 캐시하지 않음
+    - 강한 ETag(본문 sha256) 부여, If-None-Match 일치 시 304
+    - gzip 허용 클라이언트에는 1회 압축해 캐시한 bytes 반환(미들웨어 재압축 없음)
+    """
+    entry = await _aload_entry(path)
+    mtime = entry["mtime"]
+    with _resp_lock:
+        slot = _resp_cache.get(path)
+        hit = slot["items"].get(key) if slot and slot["mtime"] == mtime else None
+        if hit is not None:
+            slot["items"].move_to_end(key)
+    _M_RESP.inc((key[0], "miss" if hit is None else "hit"))
+    if hit is None:
+        body = serializer.dumps(build(entry))
+        hit = {"etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"', "body": body, "gzip": None}
+        if known is None or known(entry):
+            _store_response(path, mtime, key, hit)
+    etag, body = hit["etag"], hit["body"]
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if len(body) >= GZIP_MIN_SIZE and _accepts(request, "gzip"):
+        if hit["gzip"] is None:
+            hit["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=hit["gzip"], media_type="application/json", headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+
+# --- 스크레이프 시점 게이지: 데이터셋별 행 수/메모리/마지막 적재 시간, 캐시 적중률, 프로세스 RSS ---
+def _cache_snapshot() -> dict:
+    with _cache_lock:
+        return dict(_cache)
+
+def _table_bytes() -> dict:
+    out = {}
+    for path, e in _cache_snapshot().items():
+        heap, mapped = e["table"].nbytes()
+        out[(_dataset(path), "heap")] = heap
+        out[(_dataset(path), "mmap")] = mapped
+    return out
+
+def _hit_ratio() -> dict:
+    out = {}
+    for path in _watched_paths():
+        ds = _dataset(path)
+        hits, misses = _M_CACHE.value((ds, "hit")), _M_CACHE.value((ds, "miss"))
+        if hits + misses:
+            out[(ds,)] = hits / (hits + misses)
+    return out
+
+def _rss_bytes() -> dict:
+    try:
+        with open("/proc/self/statm") as f:
+            return {(): int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")}
+    except (OSError, ValueError, AttributeError):  # /proc 없는 환경(Windows/macOS)
+        return {}
+
+metrics.GaugeFunc("snapshot_rows", "적재된 스냅샷 행 수", ["dataset"],
+                  lambda: {(_dataset(p),): len(e["table"]) for p, e in _cache_snapshot().items()})
+metrics.GaugeFunc("snapshot_table_bytes", "적재된 Table 메모리 추정치(heap/mmap)", ["dataset", "backing"], _table_bytes)
+metrics.GaugeFunc("snapshot_last_load_seconds", "마지막 적재 소요", ["dataset"],
+                  lambda: {(_dataset(p),): e["load_seconds"] for p, e in _cache_snapshot().items()})
+metrics.GaugeFunc("snapshot_cache_hit_ratio", "스냅샷 캐시 적중률", ["dataset"], _hit_ratio)
+metrics.GaugeFunc("process_resident_memory_bytes", "프로세스 RSS", [], _rss_bytes)
+
+class _MetricsMiddleware:
+    """순수 ASGI 미들웨어: 라우트 템플릿(/progress/series 등) 기준 지연/상태 코드 기록"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = [500]
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 라우팅 후 scope["route"]가 채워짐(매칭 실패 시 하나로 묶어 라벨 폭증 방지)
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            _M_HTTP.observe((route, scope["method"]), time.perf_counter() - t0)
+            _M_HTTP_STATUS.inc((route, scope["method"], str(status[0])))
 
 
 # -------------------- FastAPI --------------------
@@ -154,74 +751,69 @@ async def lifespan(app: FastAPI):
     if PUSH_ON_START:
         try:_push_once()
         except Exception as e:_log(f"[push warn] {e}")
+    loop = asyncio.get_running_loop()
+    if SNAPSHOT_WATCH:
+        # 초기 적재(파싱)도 이벤트 루프 밖에서
+        await loop.run_in_executor(_load_executor, _start_watcher)
     yield
+    await loop.run_in_executor(None, _stop_watcher)
 
-app = FastAPI(lifespan=lifespan)
+class FastJSONResponse(JSONResponse):
+    """기본 JSON 응답을 serializer(orjson 우선) 경유로 인코딩"""
+    def render(self, content) -> bytes:
+        return serializer.dumps(content)
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+# 그 외 응답은 즉석 압축(이미 Content-Encoding이 있는 사전압축 응답은 건너뜀)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+# 가장 바깥(압축 포함 전체 지연 측정)
+app.add_middleware(_MetricsMiddleware)
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/test")
-def test(limit: int = Query(10, ge=1, le=1000), offset: int = Query(0, ge=0)):
-    rows = _load_rows()
-    sliced = rows[offset: offset + limit]
-    return {"ok": True, "total": len(rows), "limit": limit, "offset": offset, "count": len(sliced), "rows": sliced}
+async def test(limit: int = Query(10, ge=1, le=1000), offset: int = Query(0, ge=0),
+               cursor: str | None = Query(default=None, description="이전 응답의 next_cursor(지정 시 offset 무시)"),
+               fields: str | None = Query(default=None, description="응답에 넣을 컬럼(쉼표 구분)")):
+    t = (await _aload_entry(DATA_PATH))["table"]
+    if cursor:
+        offset = _decode_cursor(cursor, 1)[0]
+        if not isinstance(offset, int) or offset < 0:
+            raise HTTPException(400, detail="invalid cursor")
+    names = _parse_fields(fields, t.names)
+    end = min(offset + limit, len(t))
+    sliced = t.rows(range(min(offset, len(t)), end), names)
+    return {"ok": True, "total": len(t), "limit": limit, "offset": offset, "count": len(sliced), "rows": sliced,
+            "next_cursor": _encode_cursor([end]) if end < len(t) else None}
 
 # 차트용 데이터만 추출(필요 필드만 가볍게)
 @app.get("/chart")
-def chart():
-    rows = _load_rows()
-    pts = []
-    for r in rows:
-        d = r.get("progress_date")
-        if not d:  # 날짜 없는 행은 제외
-            continue
-        pts.append({
-            "date": d,
-            "group": r.get("study_group_title"),
-            "increased": r.get("increased_users"),
-            "total": r.get("total_users"),
-            "rate": r.get("rate"),
-            # 필요하면 아래에 추가 필드 더 넣기
-        })
-    # 문자열 날짜 기준 정렬(YYYY-MM-DD 가정)
-    pts.sort(key=lambda x: x["date"])
-    return {"ok": True, "points": pts}
+async def chart(request: Request):
+    return await _cached_json(request, DATA_PATH, ("chart",),
+                              lambda e: {"ok": True, "points": e["index"]["points"]})
 
 
 @app.get("/chart_grouped")
-def chart_grouped(group: Optional[str] = Query(default=None, description="설명서")):
-    rows = _load_rows()
+async def chart_grouped(request: Request, group: Optional[str] = Query(default=None, description="설명서")):
     want = {g.strip() for g in group.split(",")} if group else None
+    key = ("chart_grouped", tuple(sorted(want)) if want else None)
+    return await _cached_json(request, DATA_PATH, key, lambda e: _chart_grouped_payload(e, want),
+                              known=lambda e: not want or want <= e["index"]["grid"].keys())
 
-    grid = defaultdict(dict)
-    dates = set()
-
-    for r in rows:
-        d = r.get("progress_date")
-        g = r.get("study_group_title") or "전체"
-        if not d: 
-            continue
-        if want and g not in want:
-            continue
-        dates.add(d)
-        grid[g][d] = {
-            "rate": r.get("rate"),
-            "increased": r.get("increased_users"),
-            "total": r.get("total_users"),
-        }
-
-    labels = sorted(dates)
-    series = []
-    for g, by_date in sorted(grid.items()):
-        series.append({
-            "group": g,
-            "rate": [by_date.get(d, {}).get("rate") for d in labels],
-            "increased": [by_date.get(d, {}).get("increased") for d in labels],
-            "total": [by_date.get(d, {}).get("total") for d in labels],
-        })
-    return {"ok": True, "labels": labels, "series": series}
+def _chart_grouped_payload(entry: dict, want: set | None) -> dict:
+    idx = entry["index"]
+    if not want:
+        return {"ok": True, **idx["all"]}
+    # 필터: 선택 그룹들의 날짜 합집합만 labels로(그룹 수만큼만 계산)
+    groups = [g for g in idx["groups"] if g in want]
+    labels = sorted({d for g in groups for d in idx["grid"][g]})
+    return {"ok": True, "labels": labels, "series": _grouped_series(idx["grid"], groups, labels)}
 
 
 
@@ -229,58 +821,146 @@ def chart_grouped(group: Optional[str] = Query(default=None, description="설명
 
 
 @app.get("/progress/options")
-def progress_options(opentalk: str | None = Query(default=None, description="선택한 단톡방명(opentalk_code)")):
-    rows = _load_rows_from(PROGRESS_JSON_PATH)
-    codes = set()
-    names = set()
-    for r in rows:
-        code = (r.get("opentalk_code") or "").strip()
-        nick = (r.get("nickname") or "").strip()
-        if not code or not nick: continue
-        codes.add(code)
-        if (opentalk is None) or (code == opentalk):
-            names.add(nick)
-    return {"ok": True, "opentalk_codes": sorted(codes), "nicknames": sorted(names)}
+async def progress_options(request: Request, opentalk: str | None = Query(default=None, description="선택한 단톡방명(opentalk_code)")):
+    def build(entry):
+        idx = entry["index"]
+        return {"ok": True, "opentalk_codes": idx["codes"], "nicknames": idx["nicknames"].get(opentalk, [])}
+    return await _cached_json(request, PROGRESS_JSON_PATH, ("options", opentalk), build,
+                              known=lambda e: opentalk is None or opentalk in e["index"]["nicknames"])
 
 
 
 
 # --- 선택값으로 시계열(진도율) 반환 ---
 @app.get("/progress/series")
-def progress_series(opentalk: str = Query(..., description="단톡방명(opentalk_code)"), nickname: str = Query(..., description="고객명(nickname)")):
-    rows = _load_rows_from(PROGRESS_JSON_PATH)
-    pts = []
-    for r in rows:
-        if (r.get("opentalk_code") or "").strip() != opentalk: continue
-        if (r.get("nickname") or "").strip() != nickname: continue
-        d = _to_date(r.get("progress_date"))
-        if not d: continue
-        pts.append((d.isoformat(), _to_num(r.get("progress"))))
-    pts.sort(key=lambda x: x[0])
-    labels = [d for d, _ in pts]
-    data = [v for _, v in pts]
+async def progress_series(opentalk: str = Query(..., description="단톡방명(opentalk_code)"), nickname: str = Query(..., description="고객명(nickname)")):
+    labels, data = _progress_series(await _aload_entry(PROGRESS_JSON_PATH), opentalk, nickname)
     return {"ok": True, "labels": labels, "data": data, "count": len(data)}
 
 
 
 
+# --- 방 단위 일괄 시계열: 닉네임 여러 명(미지정 시 방 전체)을 같은 labels로 + 날짜별 방 평균/중앙값 ---
+@app.get("/progress/series/batch")
+async def progress_series_batch(request: Request,
+                                opentalk: str = Query(..., description="단톡방명(opentalk_code)"),
+                                nickname: list[str] | None = Query(default=None, description="고객명(반복 지정, 없으면 방 전체)"),
+                                format: str = Query("series", pattern="^(series|matrix)$", description="series: 닉네임별 배열, matrix: 행 우선 1차원 배열")):
+    key = ("series_batch", opentalk, tuple(nickname) if nickname else None, format)
+    return await _cached_json(request, PROGRESS_JSON_PATH, key,
+                              lambda e: _series_batch_payload(e, opentalk, nickname, format),
+                              known=lambda e: opentalk in e["index"]["nicknames"]
+                              and all((opentalk, n) in e["index"]["spans"] for n in nickname or ()))
+
+
+
+
+# --- 방 개요: db.py가 미리 계산한 일자 롤업/랭크 분포를 그대로(방 하나 = 날짜 수만큼) ---
+@app.get("/progress/room_daily")
+async def room_daily(request: Request, opentalk: str = Query(..., description="단톡방명(opentalk_code)")):
+    def build(entry):
+        cols = _room_columns(entry, opentalk, ["progress_date", "users", "active_users", "avg_progress", "median_progress"])
+        return {"ok": True, "opentalk": opentalk, "labels": cols.pop("progress_date"), **cols}
+    return await _cached_json(request, ROOM_DAILY_JSON_PATH, ("room_daily", opentalk), build,
+                              known=lambda e: opentalk in e["index"])
+
+@app.get("/progress/rank_dist")
+async def rank_dist(request: Request, opentalk: str = Query(..., description="단톡방명(opentalk_code)")):
+    def build(entry):
+        cols = _room_columns(entry, opentalk, ["user_rank", "users"])
+        return {"ok": True, "opentalk": opentalk, "ranks": cols["user_rank"], "users": cols["users"]}
+    return await _cached_json(request, RANK_DIST_JSON_PATH, ("rank_dist", opentalk), build,
+                              known=lambda e: opentalk in e["index"])
+
+
+
+
 # --- 인증 테이블: 선택된 opentalk_code 기준으로 필터 ---
 @app.get("/progress/cert_table")
-def cert_table(opentalk: str = Query(..., description="단톡방명(opentalk_code)")):
-    rows = _load_rows_from(CERT_JSON_PATH)
-    out = []
-    for r in rows:
-        if (r.get("opentalk_code") or "").strip() != opentalk: continue
-        out.append({
-            "name": r.get("name"),
-            "user_rank": r.get("user_rank"),
-            # --- 주의: 컬럼명은 'cert_days_count' 입니다(샘플 기준). ---
-            "cert_days_count": r.get("cert_days_count"),
-            "average_week": r.get("average_week"),
-        })
-    # 보기 좋게 정렬: 랭크 오름차순, 이름
-    out.sort(key=lambda x: (x["user_rank"] if x["user_rank"] is not None else 9999, x["name"] or ""))
-    return {"ok": True, "rows": out, "count": len(out)}
+async def cert_table(request: Request, opentalk: str = Query(..., description="단톡방명(opentalk_code)"),
+                     limit: int | None = Query(default=None, ge=1, description="최대 행 수(없으면 전체)"),
+                     offset: int = Query(0, ge=0),
+                     cursor: str | None = Query(default=None, description="이전 응답의 next_cursor(지정 시 offset 무시)"),
+                     fields: str | None = Query(default=None, description="응답에 넣을 컬럼(쉼표 구분)")):
+    after = _decode_cursor(cursor, 3) if cursor else None
+    names = _parse_fields(fields, CERT_FIELDS)
+    key = ("cert_table", opentalk, limit, offset, cursor, tuple(names))
+    return await _cached_json(request, CERT_JSON_PATH, key,
+                              lambda e: _cert_table_payload(e, opentalk, limit, offset, after, names),
+                              known=lambda e: opentalk in e["index"]["rooms"] and offset <= len(e["index"]["rooms"][opentalk]))
+
+def _cert_table_payload(entry: dict, opentalk: str, limit: int | None, offset: int, after: list | None, names: list) -> dict:
+    """인덱스의 방별 정렬 순서에서 [start, end) 구간만 복원(after: 직전 페이지 마지막 정렬 키)"""
+    t = entry["table"]
+    # --- 주의: 컬럼명은 'cert_days_count' 입니다(샘플 기준). ---
+    order = entry["index"]["rooms"].get(opentalk, array("i"))
+    start = min(offset, len(order))
+    if after is not None:
+        try:
+            start = bisect_right(entry["index"]["keys"].get(opentalk, []), tuple(after))
+        except TypeError:  # 키 타입이 다른 cursor
+            raise HTTPException(400, detail="invalid cursor")
+    end = len(order) if limit is None else min(len(order), start + limit)
+    out = t.rows(order[start:end], names)
+    next_cursor = _encode_cursor(list(entry["index"]["keys"][opentalk][end - 1])) if start < end < len(order) else None
+    return {"ok": True, "rows": out, "count": len(out), "total": len(order), "offset": start, "limit": limit,
+            "next_cursor": next_cursor}
+
+
+
+
+
+
+
+# --- 스냅샷 원본 파일: db.py가 만든 .json.br/.json.gz 사전압축본이 있으면 그대로 전송 ---
+_SNAPSHOT_NAME_RE = re.compile(r"^[A-Za-z0-9_\-]+\.json$")
+_ROWS_HASH_RE = re.compile(rb'"rows_sha256":\s*"([0-9a-f]{64})"')
+
+# 압축본 검증 결과 캐시: 원본 경로 → ((원본, sidecar stat), 사용 가능 여부) — stat이 바뀔 때만 다시 확인
+_precompressed_ok: dict[str, tuple[tuple, bool]] = {}
+
+def _precompressed_fresh(path: str) -> bool:
+    """
+    db.py가 압축본과 함께 쓴 sidecar({path}.src: 원본 size + rows_sha256)가 지금 원본과 맞는지
+    - mtime 비교는 git checkout/rsync/복원 후 옛 압축본이 더 새 mtime을 가질 수 있어 쓰지 않음
+    - sidecar가 없거나(이전 버전/직접 넣은 파일) 다르면 False → 원본 전송
+    """
+    try:
+        st, side = os.stat(path), os.stat(path + ".src")
+    except OSError:
+        return False
+    key = (st.st_mtime_ns, st.st_size, side.st_mtime_ns, side.st_size)
+    hit = _precompressed_ok.get(path)
+    if hit and hit[0] == key:
+        return hit[1]
+    try:
+        meta = serializer.load_file(path + ".src")
+        with open(path, "rb") as f:
+            f.seek(max(0, st.st_size - 512))
+            m = _ROWS_HASH_RE.search(f.read())
+        ok = (isinstance(meta, dict) and meta.get("size") == st.st_size and m is not None
+              and meta.get("rows_sha256") == m.group(1).decode("ascii"))
+    except (OSError, serializer.JSONDecodeError):
+        ok = False
+    _precompressed_ok[path] = (key, ok)
+    return ok
+
+# sync def 유지: stat/파일 전송은 FastAPI 스레드풀에서 처리(이벤트 루프 밖)
+@app.get("/data/{name}")
+def snapshot_file(request: Request, name: str):
+    if not _SNAPSHOT_NAME_RE.match(name):
+        raise HTTPException(404, detail="not found")
+    path = os.path.join(DATA_DIR, name)
+    if not os.path.isfile(path):
+        raise HTTPException(404, detail=f"{name} not found")
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    for enc, ext in (("br", ".br"), ("gzip", ".gz")):
+        pre = path + ext
+        # 압축본은 지금 원본에서 만든 것일 때만(sidecar 확인, 교체 도중/옛 압축본이면 원본 전송)
+        if _accepts(request, enc) and os.path.isfile(pre) and _precompressed_fresh(path):
+            headers["Content-Encoding"] = enc
+            return FileResponse(pre, media_type="application/json", headers=headers)
+    return FileResponse(path, media_type="application/json", headers=headers)
 
 
 
@@ -290,7 +970,7 @@ def cert_table(opentalk: str = Query(..., description="단톡방명(opentalk_cod
 
 # 단일 HTML: 여기서 직접 수정하면 됨(별도 파일 없음)
 @app.get("/dashboard", response_class=HTMLResponse)
-def dashboard():
+async def dashboard():
     return """
 <!doctype html>
 <html>
@@ -412,7 +1092,7 @@ function render(labels,series){
 
 
 @app.get("/dashboard_progress", response_class=HTMLResponse)
-def dashboard_progress():
+async def dashboard_progress():
     return """
 <!doctype html>
 <html>
@@ -585,8 +1265,8 @@ $("#applyBtn").addEventListener('click', async ()=>{
   const tb=$("#certTbody"); tb.innerHTML='';
   $("#certCount").textContent='';
   if(code){
-    const t=await getJSON(`/progress/cert_table?opentalk=${encodeURIComponent(code)}`);
-    const top=t.rows.slice(0,20);
+    const t=await getJSON(`/progress/cert_table?opentalk=${encodeURIComponent(code)}&limit=20`);
+    const top=t.rows;
     top.forEach(r=>{
       const rank=(r.user_rank??'');
       const cls = rank==1?'rank-1':(rank==2?'rank-2':(rank==3?'rank-3':''));
@@ -596,7 +1276,7 @@ $("#applyBtn").addEventListener('click', async ()=>{
       tr.innerHTML=`<td class="${cls}">${rank}</td><td>${r.name??''}</td><td>${r.cert_days_count??''}</td><td>${avg}</td>`;
       tb.appendChild(tr);
     });
-    $("#certCount").textContent=`총 ${Math.min(20, t.rows.length)}명 (상위 20명 표시)`;
+    $("#certCount").textContent=`총 ${Math.min(20, t.total)}명 (상위 20명 표시)`;
   }
 });
 
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py
+
+역할:
+- main.py 계측용 최소 Prometheus 텍스트 포맷 구현(외부 의존성 없음)
+- Counter / Histogram: 요청 경로에서 잠금 + 정수/실수 덧셈만(유휴 시 비용 0, 백그라운드 작업 없음)
+- GaugeFunc: 스크레이프 시점에만 콜백으로 값 계산(행 수, 메모리 등)
+
+사용:
+  REQUESTS = Counter("app_requests_total", "설명", ["route"])
+  REQUESTS.inc(("/health",))
+  render()  # → text/plain; version=0.0.4
+"""
+
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 기본 지연 버킷(초): 0.5ms ~ 10s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: list = []
+
+
+def _esc(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def inc(self, labels: tuple = (), n: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + n
+
+    def value(self, labels: tuple = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        out += [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._values: dict[tuple, list] = {}  # labels -> [버킷별 개수..., +Inf 개수, 합계]
+        _registry.append(self)
+
+    def observe(self, labels: tuple, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            v = self._values.get(labels)
+            if v is None:
+                v = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            v[i] += 1
+            v[-1] += value
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for k, v in items:
+            acc = 0
+            for le, n in zip((*self.buckets, float("inf")), v):
+                acc += n
+                le_label = 'le="' + _num(le) + '"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, le_label)} {acc}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {_num(v[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {acc}")
+        return out
+
+
+class GaugeFunc:
+    """스크레이프 시 fn() → {labels 튜플: 값}을 호출해 출력(요청 경로 비용 없음)"""
+    def __init__(self, name: str, help: str, labelnames, fn):
+        self.name, self.help, self.labelnames, self.fn = name, help, tuple(labelnames), fn
+        _registry.append(self)
+
+    def collect(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        out += [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(self.fn().items())]
+        return out
+
+
+def render() -> str:
+    lines = []
+    for m in _registry:
+        lines += m.collect()
+    return "\n".join(lines) + "\n"
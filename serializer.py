@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+serializer.py
+
+역할:
+- db.py(스냅샷 export)와 main.py(스냅샷 로드/API 응답)가 공통으로 쓰는 JSON 직렬화 계층
+- orjson이 설치돼 있으면 빠른 경로, 없으면 표준 json으로 자동 대체
+- 환경변수 JSON_BACKEND=json 으로 표준 json 강제 가능(비교/장애 대응용)
+
+출력 형식:
+- 두 경로 모두 compact(공백 없음) + 비ASCII 문자 그대로(UTF-8) 출력
+- date/datetime/Decimal 등은 default(기본 str)로 문자열화
+- float 표기는 orjson 기준으로 통일: 표준 json 경로도 1e-7(1e-07 아님), 1e16(1e+16 아님), 0.00001(1e-05 아님),
+  NaN/Infinity → null 로 기록 → 백엔드와 무관하게 같은 bytes(rows_sha256/변경 감지가 백엔드 전환에 흔들리지 않음)
+"""
+
+import os, json
+from json.encoder import _make_iterencode, encode_basestring
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+if os.getenv("JSON_BACKEND", "").strip().lower() == "json":
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+# orjson.JSONDecodeError는 json.JSONDecodeError의 하위 클래스 → 이것 하나로 잡으면 됨
+JSONDecodeError = json.JSONDecodeError
+
+# datetime은 orjson 기본 포맷(ISO 'T') 대신 default로 넘겨 표준 json 경로(str)와 맞춤
+_ORJSON_OPTS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+
+def dumps(obj, default=str) -> bytes:
+    """obj → UTF-8 JSON bytes(compact)"""
+    if orjson:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTS)
+    return _json_dumps(obj, default)
+
+
+_INF = float("inf")
+
+
+def _float_str(x: float) -> str:
+    """float → orjson과 같은 표기(repr과 같은 자릿수, 지수 표기만 다름. NaN/Infinity → null)"""
+    if x != x or x in (_INF, -_INF):
+        return "null"
+    r = float.__repr__(x)
+    if "e" not in r:
+        return r
+    mant, exp = r.split("e")
+    if exp == "-05":  # orjson은 1e-5 ~ 1e-4 구간을 소수로 씀
+        sign, digits = ("-", mant[1:]) if mant[0] == "-" else ("", mant)
+        return f"{sign}0.0000{digits.replace('.', '')}"
+    return f"{mant}e{int(exp)}"
+
+
+def _needs_float_str(o) -> bool:
+    """repr 표기가 orjson과 다른 float(지수 표기/NaN/Infinity)이 들어 있는지"""
+    if isinstance(o, float):
+        return not (1e-4 <= abs(o) < 1e16) and o != 0.0
+    values = o.values() if isinstance(o, dict) else o if isinstance(o, (list, tuple)) else ()
+    for v in values:
+        # 스칼라는 함수 호출 없이 바로 판단(행/컬럼 배열이 커도 스캔 비용을 작게)
+        if isinstance(v, float):
+            if not (1e-4 <= abs(v) < 1e16) and v != 0.0:
+                return True
+        elif isinstance(v, (dict, list, tuple)) and _needs_float_str(v):
+            return True
+    return False
+
+
+def _json_dumps(obj, default=str) -> bytes:
+    """표준 json 경로. 보통은 C 인코더, 표기가 다른 float이 있을 때만 _float_str을 쓰는 파이썬 인코더"""
+    if not _needs_float_str(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode("utf-8")
+    encode = _make_iterencode({}, default, encode_basestring, None, _float_str, ":", ",", False, False, True)
+    return "".join(encode(obj, 0)).encode("utf-8")
+
+
+def loads(data: bytes | str):
+    """JSON bytes/str → 파이썬 객체"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_file(path: str):
+    """
+    파일 전체를 bytes로 읽어 파싱(UTF-8 BOM 허용)
+    - FileNotFoundError / JSONDecodeError는 그대로 전파
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    return loads(data)